@@ -1,10 +1,11 @@
 """Configuración del sistema CV Evaluator."""
 
-import os
 from enum import Enum
-from typing import Optional
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class LLMProvider(str, Enum):
@@ -16,6 +17,10 @@ class LLMProvider(str, Enum):
     HUGGINGFACE = "huggingface"
 
 
+# Resolución directa valor -> miembro para el proveedor leído del entorno
+_LLM_PROVIDER_BY_VALUE = {member.value: member for member in LLMProvider}
+
+
 class Settings(BaseSettings):
     """Configuración de la aplicación."""
 
@@ -29,17 +34,32 @@ class Settings(BaseSettings):
         description="Modelo de LLM a utilizar"
     )
     llm_temperature: float = Field(
-        default=0.1,
+        default=0.0,
         ge=0.0,
         le=2.0,
         description="Temperatura del modelo (0 = determinístico)"
     )
+    llm_max_tokens: int = Field(
+        default=2048,
+        ge=1,
+        description="Máximo de tokens generados por respuesta"
+    )
+
+    llm_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Máximo de llamadas simultáneas al LLM en evaluaciones paralelas"
+    )
 
     # Ollama Configuration
     ollama_base_url: str = Field(
         default="http://localhost:11434",
         description="URL base de Ollama"
     )
+    ollama_keep_alive: str = Field(
+        default="30m",
+        description="Tiempo que Ollama mantiene el modelo (y su caché KV) en memoria"
+    )
 
     # OpenAI Configuration (si se usa)
     openai_api_key: Optional[str] = Field(
@@ -53,16 +73,53 @@ class Settings(BaseSettings):
         description="API Key de Anthropic"
     )
 
+    # Cache Configuration
+    cache_dir: Path = Field(
+        default=Path("~/.cache/cv_evaluator"),
+        description="Directorio de la caché en disco"
+    )
+    analysis_cache_ttl: int = Field(
+        default=7 * 24 * 3600,
+        ge=0,
+        description="Validez en segundos de un análisis cacheado (0 = desactivada)"
+    )
+    llm_cache_ttl: int = Field(
+        default=7 * 24 * 3600,
+        ge=0,
+        description="Validez en segundos de una respuesta del LLM en la caché en disco (0 = desactivada)"
+    )
+    health_cache_ttl: int = Field(
+        default=30,
+        ge=0,
+        description="Validez en segundos de un health check correcto (0 = desactivada)"
+    )
+
     # Application Settings
     app_name: str = Field(default="CV Evaluator")
     app_version: str = Field(default="1.0.0")
     debug: bool = Field(default=False)
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"
+    @field_validator("llm_provider", mode="before")
+    @classmethod
+    def _resolve_llm_provider(cls, value: Any) -> Any:
+        """Resuelve el proveedor con una búsqueda en diccionario."""
+        if isinstance(value, str):
+            return _LLM_PROVIDER_BY_VALUE.get(value.lower(), value)
+        return value
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Devuelve la configuración de la aplicación.
 
-# Instancia global de configuración
-settings = Settings()
+    El `.env` y las variables de entorno se leen y validan una sola vez por
+    proceso; las llamadas posteriores devuelven la misma instancia.
+    """
+    return Settings()
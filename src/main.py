@@ -1,15 +1,13 @@
 """Punto de entrada principal para ejecución por terminal."""
 
+import argparse
 import sys
 from pathlib import Path
 
-from src.config import settings
-from src.services.llm_service import LLMService
-from src.services.cv_analyzer import CVAnalyzer
-from src.services.interviewer import Interviewer
+from src.config import Settings, get_settings
 
 
-def print_header():
+def print_header(settings: Settings):
     """Imprime el encabezado de la aplicación."""
     print("\n" + "=" * 60)
     print("       CV EVALUATOR - Sistema de Evaluación de Candidatos")
@@ -38,10 +36,16 @@ def load_file(prompt: str) -> str:
 
 
 def input_multiline() -> str:
-    """Lee entrada multilínea hasta línea vacía."""
+    """
+    Lee entrada multilínea hasta línea vacía o fin de la entrada.
+
+    Lee directamente de `sys.stdin` en lugar de llamar a `input()` por línea.
+    Con entrada redirigida no se consume más allá de la línea vacía, para que
+    la oferta, el CV y las respuestas puedan ir en el mismo flujo.
+    """
     lines = []
-    while True:
-        line = input()
+    for line in iter(sys.stdin.readline, ""):
+        line = line.rstrip("\r\n")
         if line == "":
             break
         lines.append(line)
@@ -50,34 +54,41 @@ def input_multiline() -> str:
 
 def print_result(cv_result):
     """Imprime el resultado de la evaluación."""
-    print("\n" + "-" * 40)
-    print("RESULTADO DEL ANÁLISIS INICIAL")
-    print("-" * 40)
-
-    print(f"\nPuntuación: {cv_result.score}%")
-    print(f"Descartado: {'Sí' if cv_result.discarded else 'No'}")
+    # Se compone el bloque completo y se escribe de una vez
+    parts = [
+        "\n" + "-" * 40,
+        "RESULTADO DEL ANÁLISIS INICIAL",
+        "-" * 40,
+        f"\nPuntuación: {cv_result.score}%",
+        f"Descartado: {'Sí' if cv_result.discarded else 'No'}",
+    ]
 
     if cv_result.discarding_requirement:
-        print(f"Motivo del descarte: {cv_result.discarding_requirement}")
+        parts.append(f"Motivo del descarte: {cv_result.discarding_requirement}")
 
-    print("\nRequisitos cumplidos:")
-    for req in cv_result.matching_requirements:
-        print(f"  - {req}")
+    parts.append("\nRequisitos cumplidos:")
+    parts.extend(f"  - {req}" for req in cv_result.matching_requirements)
 
     if cv_result.unmatching_requirements:
-        print("\nRequisitos no cumplidos:")
-        for req in cv_result.unmatching_requirements:
-            print(f"  - {req}")
+        parts.append("\nRequisitos no cumplidos:")
+        parts.extend(f"  - {req}" for req in cv_result.unmatching_requirements)
 
-    print("\nRequisitos no encontrados en CV:")
-    for req in cv_result.not_found_requirements:
-        print(f"  - {req}")
+    parts.append("\nRequisitos no encontrados en CV:")
+    parts.extend(f"  - {req}" for req in cv_result.not_found_requirements)
 
-    print("-" * 40)
+    parts.append("-" * 40)
+    print("\n".join(parts))
 
 
 def run_interview(cv_result, job_offer, llm_service):
     """Ejecuta la fase de entrevista."""
+    from src.services.interviewer import Interviewer
+    from src.prompts.templates import FAREWELL_ALL_MATCHED
+
+    if not cv_result.not_found_requirements:
+        print(f"\nEntrevistador: {FAREWELL_ALL_MATCHED}")
+        return
+
     interviewer = Interviewer(llm_service)
 
     print("\n" + "=" * 60)
@@ -89,18 +100,26 @@ def run_interview(cv_result, job_offer, llm_service):
     print(f"Entrevistador: {greeting}\n")
 
     # Preguntas
-    newly_fulfilled = []
-    for requirement in cv_result.not_found_requirements:
-        question = interviewer.generate_question(requirement)
+    requirements = cv_result.not_found_requirements
+    questions = interviewer.generate_questions(requirements)
+
+    qa_pairs = []
+    for requirement, question in zip(requirements, questions):
         print(f"Entrevistador: {question}")
         answer = input("Tú: ").strip()
+        print()
+        qa_pairs.append((requirement, question, answer))
 
-        response = interviewer.evaluate_answer(requirement, question, answer)
-        if response.fulfills_requirement:
+    # Evaluar todas las respuestas en una sola llamada
+    print("Evaluando respuestas...\n")
+    newly_fulfilled = []
+    verdicts = interviewer.evaluate_answers_batch(qa_pairs)
+    for (requirement, _, _), fulfilled in zip(qa_pairs, verdicts):
+        if fulfilled:
             newly_fulfilled.append(requirement)
-            print("(Requisito cumplido)\n")
+            print(f"(Requisito cumplido) {requirement}")
         else:
-            print("(Requisito no cumplido)\n")
+            print(f"(Requisito no cumplido) {requirement}")
 
     # Calcular puntuación final
     total_requirements = len(job_offer.requirements)
@@ -110,7 +129,7 @@ def run_interview(cv_result, job_offer, llm_service):
     if cv_result.discarded:
         final_score = 0
     elif total_requirements > 0:
-        final_score = int((final_fulfilled / total_requirements) * 100)
+        final_score = (final_fulfilled * 100) // total_requirements
     else:
         final_score = 100
 
@@ -121,24 +140,41 @@ def run_interview(cv_result, job_offer, llm_service):
     print(f"\nEntrevistador: {farewell}")
 
     # Resultado final
-    print("\n" + "=" * 60)
-    print("       RESULTADO FINAL")
-    print("=" * 60)
-    print(f"Puntuación inicial: {cv_result.score}%")
-    print(f"Puntuación final: {final_score}%")
-    print(f"Requisitos cumplidos: {final_fulfilled}/{total_requirements}")
-    print("=" * 60 + "\n")
+    print("\n".join([
+        "\n" + "=" * 60,
+        "       RESULTADO FINAL",
+        "=" * 60,
+        f"Puntuación inicial: {cv_result.score}%",
+        f"Puntuación final: {final_score}%",
+        f"Requisitos cumplidos: {final_fulfilled}/{total_requirements}",
+        "=" * 60 + "\n",
+    ]))
 
 
 def main():
     """Función principal."""
-    print_header()
+    parser = argparse.ArgumentParser(description="CV Evaluator (CLI)")
+    parser.add_argument(
+        "--no-health-cache",
+        action="store_true",
+        help="Comprobar siempre la conexión con el LLM, ignorando la caché",
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    print_header(settings)
+
+    # Importación diferida: LangChain y los SDKs de los proveedores solo se
+    # cargan una vez mostrado el encabezado.
+    from src.services.llm_service import LLMService
+    from src.services.cv_analyzer import CVAnalyzer
+    from src.services.analysis_cache import AnalysisCache
 
     # Verificar conexión
     print("Verificando conexión con LLM...")
     try:
         llm_service = LLMService()
-        if not llm_service.health_check():
+        if not llm_service.health_check(use_cache=not args.no_health_cache):
             print("ERROR: No se pudo conectar con el LLM")
             print("Asegúrate de que Ollama está ejecutándose.")
             sys.exit(1)
@@ -151,10 +187,17 @@ def main():
     offer_text = load_file("\n[OFERTA DE TRABAJO]")
     cv_text = load_file("\n[CV DEL CANDIDATO]")
 
-    # Análisis
-    print("\nAnalizando CV...")
-    analyzer = CVAnalyzer(llm_service)
-    cv_result, job_offer = analyzer.analyze(offer_text, cv_text)
+    # Análisis (reutiliza un análisis previo de la misma oferta y CV)
+    cache = AnalysisCache(settings.cache_dir, settings.analysis_cache_ttl)
+    cached = cache.get(offer_text, cv_text, llm_service)
+    if cached:
+        print("\nUsando análisis en caché.")
+        cv_result, job_offer = cached
+    else:
+        print("\nAnalizando CV...")
+        analyzer = CVAnalyzer(llm_service)
+        cv_result, job_offer = analyzer.analyze(offer_text, cv_text)
+        cache.set(offer_text, cv_text, llm_service, cv_result, job_offer)
 
     print_result(cv_result)
 
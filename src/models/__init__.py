@@ -1,19 +1,40 @@
-"""Modelos de datos del sistema."""
+"""Modelos de datos del sistema.
 
-from .schemas import (
-    Requirement,
-    RequirementType,
-    JobOffer,
-    CVEvaluationResult,
-    InterviewResponse,
-    FinalEvaluationResult,
-)
+Los esquemas se resuelven de forma perezosa (PEP 562) para que importar el
+paquete no construya los validadores de Pydantic hasta que se usan.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .schemas import (
+        Requirement,
+        RequirementType,
+        MANDATORY,
+        OPTIONAL,
+        JobOffer,
+        CVEvaluationResult,
+        InterviewResponse,
+        FinalEvaluationResult,
+    )
 
 __all__ = [
     "Requirement",
     "RequirementType",
+    "MANDATORY",
+    "OPTIONAL",
     "JobOffer",
     "CVEvaluationResult",
     "InterviewResponse",
     "FinalEvaluationResult",
 ]
+
+
+def __getattr__(name: str):
+    """Importa el esquema solicitado la primera vez que se accede."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(".schemas", __name__), name)
+    globals()[name] = value
+    return value
@@ -1,15 +1,14 @@
 """Schemas Pydantic para validación de datos."""
 
-from enum import Enum
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Final, Literal
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class RequirementType(str, Enum):
-    """Tipo de requisito de la oferta."""
+# Tipo de requisito de la oferta
+RequirementType = Literal["mandatory", "optional"]
 
-    MANDATORY = "mandatory"  # Obligatorio - descarta si no se cumple
-    OPTIONAL = "optional"    # Opcional/Deseable - suma puntos pero no descarta
+MANDATORY: Final = "mandatory"  # Obligatorio - descarta si no se cumple
+OPTIONAL: Final = "optional"    # Opcional/Deseable - suma puntos pero no descarta
 
 
 class Requirement(BaseModel):
@@ -20,8 +19,8 @@ class Requirement(BaseModel):
         ..., description="Tipo de requisito (obligatorio u opcional)"
     )
 
-    class Config:
-        use_enum_values = True
+    # Inmutable y hashable: los requisitos solo se leen tras el parseo
+    model_config = ConfigDict(frozen=True)
 
 
 class JobOffer(BaseModel):
@@ -38,7 +37,7 @@ class RequirementEvaluation(BaseModel):
 
     requirement: str = Field(..., description="Descripción del requisito")
     requirement_type: str = Field(..., description="Tipo: mandatory u optional")
-    status: str = Field(..., description="Estado: matching, unmatching, not_found")
+    status: str = Field(..., description="Estado: matching, unmatching, not_found o not_evaluated")
     reasoning: str = Field(..., description="Explicación del LLM")
 
 
@@ -93,6 +92,15 @@ class InterviewResponse(BaseModel):
     )
 
 
+class AnswerEvaluation(BaseModel):
+    """Veredicto del LLM sobre una respuesta de la entrevista."""
+
+    fulfills_requirement: bool = Field(
+        False, description="Si la respuesta cumple el requisito"
+    )
+    reasoning: str = Field("", description="Breve explicación")
+
+
 class FinalEvaluationResult(BaseModel):
     """Resultado final tras la entrevista."""
 
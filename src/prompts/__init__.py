@@ -3,17 +3,41 @@
 from .templates import (
     PARSE_OFFER_PROMPT,
     EVALUATE_CV_PROMPT,
+    EVALUATE_CV_PROMPT_PREFIX,
+    EVALUATE_CV_PROMPT_SUFFIX,
     INTERVIEW_QUESTION_PROMPT,
+    INTERVIEW_QUESTIONS_BATCH_PROMPT,
     EVALUATE_ANSWER_PROMPT,
+    EVALUATE_ANSWERS_BATCH_PROMPT,
     GENERATE_GREETING_PROMPT,
-    GENERATE_FAREWELL_PROMPT,
+    FAREWELL_TEMPLATES,
+    FAREWELL_ALL_MATCHED,
+    PARSE_OFFER_PROMPT_FN,
+    INTERVIEW_QUESTION_PROMPT_FN,
+    INTERVIEW_QUESTIONS_BATCH_PROMPT_FN,
+    EVALUATE_ANSWER_PROMPT_FN,
+    EVALUATE_ANSWERS_BATCH_PROMPT_FN,
+    EVALUATE_CV_SYSTEM_PROMPT,
+    EVALUATE_CV_USER_PROMPT_FN,
 )
 
 __all__ = [
     "PARSE_OFFER_PROMPT",
     "EVALUATE_CV_PROMPT",
+    "EVALUATE_CV_PROMPT_PREFIX",
+    "EVALUATE_CV_PROMPT_SUFFIX",
     "INTERVIEW_QUESTION_PROMPT",
+    "INTERVIEW_QUESTIONS_BATCH_PROMPT",
     "EVALUATE_ANSWER_PROMPT",
+    "EVALUATE_ANSWERS_BATCH_PROMPT",
     "GENERATE_GREETING_PROMPT",
-    "GENERATE_FAREWELL_PROMPT",
+    "FAREWELL_TEMPLATES",
+    "FAREWELL_ALL_MATCHED",
+    "PARSE_OFFER_PROMPT_FN",
+    "INTERVIEW_QUESTION_PROMPT_FN",
+    "INTERVIEW_QUESTIONS_BATCH_PROMPT_FN",
+    "EVALUATE_ANSWER_PROMPT_FN",
+    "EVALUATE_ANSWERS_BATCH_PROMPT_FN",
+    "EVALUATE_CV_SYSTEM_PROMPT",
+    "EVALUATE_CV_USER_PROMPT_FN",
 ]
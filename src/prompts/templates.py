@@ -1,5 +1,36 @@
 """Templates de prompts para las diferentes fases del sistema."""
 
+import sys
+from string import Formatter
+from typing import Callable
+
+
+def _compile(template: str) -> Callable[..., str]:
+    """
+    Precompila un template para renderizarlo con `str.format_map`.
+
+    Los campos del template se extraen una sola vez, de modo que una
+    variable ausente falla de inmediato con un mensaje claro.
+
+    Args:
+        template: Template con variables {variable}
+
+    Returns:
+        Función que recibe las variables como kwargs y devuelve el prompt
+    """
+    fields = frozenset(
+        name for _, name, _, _ in Formatter().parse(template) if name
+    )
+
+    def render(**variables) -> str:
+        missing = fields - variables.keys()
+        if missing:
+            raise KeyError(f"Faltan variables para el prompt: {sorted(missing)}")
+        return template.format_map(variables)
+
+    return render
+
+
 # =============================================================================
 # FASE 0: PARSEO DE LA OFERTA
 # =============================================================================
@@ -34,16 +65,13 @@ Responde ÚNICAMENTE con un JSON válido con esta estructura exacta (sin explica
 # FASE 1: EVALUACIÓN DEL CV
 # =============================================================================
 
-EVALUATE_CV_PROMPT = """Eres un experto en recursos humanos evaluando candidatos.
+# El bloque de instrucciones va primero y es idéntico en todas las
+# evaluaciones, de modo que el backend puede reutilizar su caché KV; solo el
+# sufijo con los requisitos y el CV cambia entre llamadas.
+EVALUATE_CV_PROMPT_PREFIX = """Eres un experto en recursos humanos evaluando candidatos.
 
 Tu tarea es analizar si el CV del candidato cumple cada uno de los requisitos de la oferta.
 
-REQUISITOS DE LA OFERTA:
-{requirements_json}
-
-CV DEL CANDIDATO:
-{cv_text}
-
 INSTRUCCIONES:
 1. Para cada requisito, determina si el CV lo cumple, no lo cumple, o no hay información suficiente.
 2. Sé riguroso pero justo en la evaluación.
@@ -73,6 +101,7 @@ INSTRUCCIONES:
    - "Native English speaker" -> CUMPLE "Inglés alto".
    
    Si no encaja en ninguno de los anteriores -> "not_found".
+5. Devuelve las evaluaciones en el mismo orden en que aparecen los requisitos.
 
 Responde ÚNICAMENTE con un JSON válido con esta estructura exacta:
 {{
@@ -87,6 +116,18 @@ Responde ÚNICAMENTE con un JSON válido con esta estructura exacta:
 }}
 """
 
+EVALUATE_CV_PROMPT_SUFFIX = """
+REQUISITOS DE LA OFERTA (uno por línea: tipo, tabulador y descripción; tipo M = "mandatory", O = "optional"):
+{requirements_text}
+
+CV DEL CANDIDATO:
+{cv_text}
+
+Responde ÚNICAMENTE con el JSON indicado.
+"""
+
+EVALUATE_CV_PROMPT = EVALUATE_CV_PROMPT_PREFIX + EVALUATE_CV_PROMPT_SUFFIX
+
 # =============================================================================
 # FASE 2: ENTREVISTA
 # =============================================================================
@@ -115,6 +156,31 @@ INSTRUCCIONES:
 - Responde SOLO con la pregunta, sin introducción ni formato adicional.
 """
 
+INTERVIEW_QUESTIONS_BATCH_PROMPT = """Eres un entrevistador profesional de recursos humanos.
+
+Debes formular una pregunta clara y directa al candidato por cada uno de los siguientes requisitos que no se encontraron en su CV:
+
+REQUISITOS:
+{requirements_json}
+
+INSTRUCCIONES:
+- Formula exactamente una pregunta por requisito, en el mismo orden.
+- Cada pregunta debe ser directa y fácil de entender.
+- Pregunta si tiene experiencia o conocimientos en el tema.
+- Sé amable y profesional.
+- Las preguntas deben ser en español.
+
+Responde ÚNICAMENTE con un JSON válido con esta estructura exacta:
+{{
+    "questions": [
+        {{
+            "requirement": "Requisito tal cual aparece en la lista",
+            "question": "Pregunta para el candidato"
+        }}
+    ]
+}}
+"""
+
 EVALUATE_ANSWER_PROMPT = """Eres un experto en recursos humanos evaluando respuestas de candidatos.
 
 REQUISITO EVALUADO: {requirement}
@@ -136,19 +202,90 @@ Responde ÚNICAMENTE con un JSON válido:
 }}
 """
 
-GENERATE_FAREWELL_PROMPT = """Eres un entrevistador profesional de recursos humanos.
+EVALUATE_ANSWERS_BATCH_PROMPT = """Eres un experto en recursos humanos evaluando respuestas de candidatos.
+
+A continuación tienes varias respuestas de un candidato, cada una con el requisito evaluado y la pregunta realizada:
 
-Genera un mensaje de despedida breve para el candidato, informándole de:
-- Puntuación inicial (antes de la entrevista): {initial_score}%
-- Puntuación final (después de la entrevista): {final_score}%
-- Si fue descartado: {discarded}
+RESPUESTAS:
+{qa_json}
 
 INSTRUCCIONES:
-- Sé amable y profesional.
-- Si la puntuación mejoró, felicítale.
-- Si fue descartado, sé empático pero profesional.
-- Agradece su tiempo.
-- El mensaje debe ser en español y no más de 3-4 oraciones.
+Analiza, para cada elemento, si la respuesta del candidato indica que cumple el requisito.
+- Si menciona experiencia, conocimientos o formación relacionada: CUMPLE
+- Si dice que no tiene experiencia o conocimientos: NO CUMPLE
+- Si la respuesta es ambigua o evasiva: NO CUMPLE
+Evalúa cada respuesta de forma independiente.
 
-Responde solo con el texto del mensaje, sin comillas ni formato adicional.
+Responde ÚNICAMENTE con un JSON válido con esta estructura exacta, con un elemento por cada "id":
+{{
+    "evaluations": [
+        {{
+            "id": 1,
+            "fulfills_requirement": true o false,
+            "reasoning": "Breve explicación"
+        }}
+    ]
+}}
 """
+
+# Despedidas por plantilla, indexadas por (mejoró la puntuación, descartado).
+# El mensaje solo depende de tres valores, así que no hace falta el LLM.
+_FAREWELL_DISCARDED = (
+    "Muchas gracias por tu tiempo y por tu interés en el puesto. "
+    "Lamentablemente, no cumples uno de los requisitos obligatorios, por "
+    "lo que no podemos continuar con tu candidatura en esta ocasión. "
+    "Te deseamos mucho éxito."
+)
+
+FAREWELL_TEMPLATES = {
+    (True, False): (
+        "¡Muchas gracias por tu tiempo! Nos alegra decirte que, tras la "
+        "entrevista, tu puntuación ha subido del {initial_score}% al "
+        "{final_score}%. Te contactaremos pronto con los próximos pasos."
+    ),
+    (False, False): (
+        "Muchas gracias por tu tiempo y por tus respuestas. Tu puntuación "
+        "final es del {final_score}% (partías de un {initial_score}%). "
+        "Te contactaremos pronto con los próximos pasos."
+    ),
+    (True, True): _FAREWELL_DISCARDED,
+    (False, True): _FAREWELL_DISCARDED,
+}
+
+# Despedida fija cuando no hay requisitos sobre los que preguntar: no merece
+# una llamada al LLM.
+FAREWELL_ALL_MATCHED = (
+    "Gracias por tu tiempo. No tenemos preguntas adicionales sobre tu CV; "
+    "te informaremos de los próximos pasos del proceso."
+)
+
+# =============================================================================
+# INTERNADO DE PROMPTS
+# =============================================================================
+# Cada prompt vive una sola vez en memoria y las comparaciones entre
+# instancias se resuelven por identidad.
+
+PARSE_OFFER_PROMPT = sys.intern(PARSE_OFFER_PROMPT)
+EVALUATE_CV_PROMPT_PREFIX = sys.intern(EVALUATE_CV_PROMPT_PREFIX)
+EVALUATE_CV_PROMPT_SUFFIX = sys.intern(EVALUATE_CV_PROMPT_SUFFIX)
+EVALUATE_CV_PROMPT = sys.intern(EVALUATE_CV_PROMPT)
+GENERATE_GREETING_PROMPT = sys.intern(GENERATE_GREETING_PROMPT)
+INTERVIEW_QUESTION_PROMPT = sys.intern(INTERVIEW_QUESTION_PROMPT)
+INTERVIEW_QUESTIONS_BATCH_PROMPT = sys.intern(INTERVIEW_QUESTIONS_BATCH_PROMPT)
+EVALUATE_ANSWER_PROMPT = sys.intern(EVALUATE_ANSWER_PROMPT)
+EVALUATE_ANSWERS_BATCH_PROMPT = sys.intern(EVALUATE_ANSWERS_BATCH_PROMPT)
+
+# =============================================================================
+# TEMPLATES PRECOMPILADOS
+# =============================================================================
+
+PARSE_OFFER_PROMPT_FN = _compile(PARSE_OFFER_PROMPT)
+INTERVIEW_QUESTION_PROMPT_FN = _compile(INTERVIEW_QUESTION_PROMPT)
+INTERVIEW_QUESTIONS_BATCH_PROMPT_FN = _compile(INTERVIEW_QUESTIONS_BATCH_PROMPT)
+EVALUATE_ANSWER_PROMPT_FN = _compile(EVALUATE_ANSWER_PROMPT)
+EVALUATE_ANSWERS_BATCH_PROMPT_FN = _compile(EVALUATE_ANSWERS_BATCH_PROMPT)
+
+# Evaluación del CV separada en mensaje de sistema (instrucciones estáticas,
+# cacheables por el proveedor) y mensaje de usuario (requisitos y CV)
+EVALUATE_CV_SYSTEM_PROMPT = sys.intern(EVALUATE_CV_PROMPT_PREFIX.format())
+EVALUATE_CV_USER_PROMPT_FN = _compile(EVALUATE_CV_PROMPT_SUFFIX)
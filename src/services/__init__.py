@@ -1,7 +1,40 @@
-"""Servicios del sistema CV Evaluator."""
+"""Servicios del sistema CV Evaluator.
 
-from .llm_service import LLMService
-from .cv_analyzer import CVAnalyzer
-from .interviewer import Interviewer
+Los servicios se resuelven de forma perezosa (PEP 562) para que
+`import src.services` no arrastre LangChain ni los SDKs de los proveedores.
+"""
 
-__all__ = ["LLMService", "CVAnalyzer", "Interviewer"]
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .llm_service import LLMService
+    from .cv_analyzer import CVAnalyzer
+    from .interviewer import Interviewer
+    from .analysis_cache import AnalysisCache
+    from .cache_store import SqliteCache
+
+_LAZY_IMPORTS = {
+    "LLMService": ".llm_service",
+    "CVAnalyzer": ".cv_analyzer",
+    "Interviewer": ".interviewer",
+    "AnalysisCache": ".analysis_cache",
+    "SqliteCache": ".cache_store",
+}
+
+__all__ = [
+    "LLMService",
+    "CVAnalyzer",
+    "Interviewer",
+    "AnalysisCache",
+    "SqliteCache",
+]
+
+
+def __getattr__(name: str):
+    """Importa el servicio solicitado la primera vez que se accede."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
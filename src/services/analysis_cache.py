@@ -0,0 +1,119 @@
+"""Caché en disco de los análisis de CV.
+
+Guarda el resultado de `CVAnalyzer.analyze` indexado por el contenido de la
+oferta, el CV, la configuración del LLM (proveedor, modelo y temperatura) y
+los prompts, de modo que repetir una ejecución con
+los mismos datos no vuelve a llamar al LLM.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from src.models.schemas import CVEvaluationResult, JobOffer
+from src.prompts.templates import PARSE_OFFER_PROMPT, EVALUATE_CV_PROMPT
+
+if TYPE_CHECKING:
+    from src.services.llm_service import LLMService
+
+
+class AnalysisCache:
+    """Caché de resultados de análisis direccionada por contenido."""
+
+    def __init__(self, cache_dir: Path, ttl_seconds: int):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir: Directorio donde se guardan las entradas
+            ttl_seconds: Antigüedad máxima de una entrada (0 desactiva la caché)
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si la caché está activa."""
+        return self.ttl_seconds > 0
+
+    def _key(self, offer_text: str, cv_text: str, llm: "LLMService") -> str:
+        """Calcula la clave de una entrada a partir de su contenido."""
+        h = hashlib.blake2b(digest_size=20)
+        for part in (
+            llm.provider.value,
+            llm.model,
+            repr(llm.temperature),
+            PARSE_OFFER_PROMPT,
+            EVALUATE_CV_PROMPT,
+            offer_text,
+            cv_text,
+        ):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, offer_text: str, cv_text: str, llm: "LLMService") -> Path:
+        return self.cache_dir / f"{self._key(offer_text, cv_text, llm)}.json"
+
+    def get(
+        self, offer_text: str, cv_text: str, llm: "LLMService"
+    ) -> Optional[Tuple[CVEvaluationResult, JobOffer]]:
+        """
+        Busca un análisis previo.
+
+        Args:
+            offer_text: Texto de la oferta de trabajo
+            cv_text: Texto del CV del candidato
+            llm: Servicio con el que se hizo el análisis
+
+        Returns:
+            Tupla (resultado, oferta) o None si no hay entrada vigente
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(offer_text, cv_text, llm)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return (
+                CVEvaluationResult.model_validate(data["cv_result"]),
+                JobOffer.model_validate(data["job_offer"]),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(
+        self,
+        offer_text: str,
+        cv_text: str,
+        llm: "LLMService",
+        cv_result: CVEvaluationResult,
+        job_offer: JobOffer,
+    ) -> None:
+        """Guarda un análisis de forma atómica (escritura + rename)."""
+        if not self.enabled:
+            return
+
+        path = self._path(offer_text, cv_text, llm)
+        payload = json.dumps(
+            {
+                "cv_result": cv_result.model_dump(mode="json"),
+                "job_offer": job_offer.model_dump(mode="json"),
+            },
+            ensure_ascii=False,
+        )
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            # La caché es una optimización: un fallo de escritura no es fatal
+            pass
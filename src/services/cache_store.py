@@ -0,0 +1,89 @@
+"""Caché clave-valor persistente en SQLite.
+
+Respalda la caché exacta de respuestas del LLM entre procesos: al repetir una
+batería de pruebas, las llamadas con el mismo prompt se sirven desde disco.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class SqliteCache:
+    """Caché clave-valor en una tabla SQLite, con caducidad por antigüedad."""
+
+    def __init__(self, path: Path, ttl_seconds: int):
+        """
+        Abre (o crea) la base de datos de la caché.
+
+        Args:
+            path: Ruta del fichero SQLite
+            ttl_seconds: Antigüedad máxima de una entrada (0 desactiva la caché)
+        """
+        self.path = Path(path).expanduser()
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if not self.enabled:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Una sola conexión compartida entre hilos, serializada con el lock
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            # WAL permite leer mientras otro proceso escribe
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv"
+                " (k TEXT PRIMARY KEY, v TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        except sqlite3.Error:
+            # La caché es una optimización: sin base de datos se desactiva
+            self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si la caché está activa."""
+        return self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca una entrada vigente.
+
+        Returns:
+            El valor guardado, o None si no existe o ha caducado
+        """
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT v FROM kv WHERE k = ? AND ts >= ?",
+                    (key, int(time.time()) - self.ttl_seconds),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Guarda (o reemplaza) una entrada."""
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO kv (k, v, ts) VALUES (?, ?, ?)",
+                    (key, value, int(time.time())),
+                )
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Cierra la conexión con la base de datos."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,20 +1,62 @@
 """Servicio de análisis de CV - Fase 1 del sistema."""
 
+import hashlib
 import re
-from typing import List
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from src.models.schemas import (
     Requirement,
-    RequirementType,
+    MANDATORY,
+    OPTIONAL,
     JobOffer,
     CVEvaluationResult,
     RequirementEvaluation,
     EvaluationSummary,
 )
-from src.prompts.templates import PARSE_OFFER_PROMPT, EVALUATE_CV_PROMPT
+from src.prompts.templates import (
+    PARSE_OFFER_PROMPT_FN,
+    EVALUATE_CV_SYSTEM_PROMPT,
+    EVALUATE_CV_USER_PROMPT_FN,
+)
 from src.services.llm_service import LLMService
 
 
+# Palabras que típicamente preceden a listas de tecnologías, en orden de
+# prioridad (se usa el primer prefijo que aparezca, no el más a la izquierda)
+_PREFIX_RES = tuple(
+    re.compile(prefix, re.IGNORECASE)
+    for prefix in (
+        r"conocimientos?\s+(?:en|de|sobre)",
+        r"experiencia\s+(?:en|con)",
+        r"manejo\s+de",
+        r"dominio\s+de",
+        r"uso\s+de",
+        r"trabajo\s+con",
+    )
+)
+
+# Conectores de listas
+_COMMA_Y_RE = re.compile(r',\s*y\s+', re.IGNORECASE)
+_Y_RE = re.compile(r'\s+y\s+', re.IGNORECASE)
+_COMMA_O_RE = re.compile(r',\s*o\s+', re.IGNORECASE)
+_O_SPLIT_RE = re.compile(r'\s+o\s+', re.IGNORECASE)
+
+# Todos los separadores sin ambigüedad en una sola alternancia, para separar
+# la lista en una única pasada
+_LIST_SEP_RE = re.compile(r',\s*y\s+|\s+y\s+|,', re.IGNORECASE)
+_LIST_SEP_OR_RE = re.compile(r',\s*[yo]\s+|\s+y\s+|,', re.IGNORECASE)
+
+# Ofertas parseadas que se conservan en la caché de `CVAnalyzer`
+_JOB_OFFER_CACHE_SIZE = 64
+
+# Coletillas que se eliminan de los requisitos al mostrarlos en el resumen
+_SUMMARY_STRIP_RE = re.compile(
+    r"Valorable |conocimientos en |Experiencia mínima de |experiencia en "
+)
+
+
 def _preprocess_cv_skills(cv_text: str) -> str:
     """
     Pre-procesa el CV para reformatear las secciones de habilidades.
@@ -115,10 +157,14 @@ def _preprocess_cv_skills(cv_text: str) -> str:
     return '\n'.join(result_lines)
 
 
-def _split_compound_requirement(description: str) -> List[str]:
+@lru_cache(maxsize=1024)
+def _split_compound_requirement(description: str) -> Tuple[str, ...]:
     """
     Separa un requisito compuesto en requisitos individuales.
 
+    El resultado se memoriza (es una tupla, para que no se pueda modificar
+    la copia cacheada): los mismos requisitos se repiten entre ofertas.
+
     Ejemplo:
         "Valorable conocimientos en FastAPI y LangChain"
         -> ["Valorable conocimientos en FastAPI", "Valorable conocimientos en LangChain"]
@@ -130,29 +176,17 @@ def _split_compound_requirement(description: str) -> List[str]:
         description: Descripción del requisito que puede contener múltiples items
 
     Returns:
-        Lista de requisitos individuales
+        Tupla de requisitos individuales
     """
     # Patrones comunes que indican múltiples tecnologías/habilidades
     # Buscar patrones como "en X, Y y Z" o "de X y Y" o simplemente "X, Y, Z"
 
-    # Palabras que típicamente preceden a listas de tecnologías
-    prefixes = [
-        r"conocimientos?\s+(?:en|de|sobre)",
-        r"experiencia\s+(?:en|con)",
-        r"manejo\s+de",
-        r"dominio\s+de",
-        r"uso\s+de",
-        r"trabajo\s+con",
-    ]
-
     # Intentar encontrar un prefijo que preceda a la lista
     prefix_match = None
-    prefix_pattern = None
-    for prefix in prefixes:
-        match = re.search(prefix, description, re.IGNORECASE)
+    for prefix_re in _PREFIX_RES:
+        match = prefix_re.search(description)
         if match:
             prefix_match = match
-            prefix_pattern = prefix
             break
 
     if prefix_match:
@@ -167,7 +201,7 @@ def _split_compound_requirement(description: str) -> List[str]:
 
         if len(items) > 1:
             # Reconstruir cada requisito individual
-            return [f"{before_prefix}{prefix_text} {item.strip()}" for item in items]
+            return tuple(f"{before_prefix}{prefix_text} {item.strip()}" for item in items)
 
     # Si no hay prefijo reconocido, intentar separar de forma más simple
     # Solo si hay patrones claros como "X y Y" donde X e Y parecen tecnologías
@@ -176,10 +210,10 @@ def _split_compound_requirement(description: str) -> List[str]:
         # Verificar que los items parecen ser tecnologías/habilidades individuales
         # (palabras cortas, sin verbos comunes)
         if all(len(item.split()) <= 3 for item in simple_split):
-            return simple_split
+            return tuple(simple_split)
 
     # No se pudo separar, devolver como está
-    return [description]
+    return (description,)
 
 
 def _split_list_items(text: str, include_or: bool = True) -> List[str]:
@@ -195,18 +229,25 @@ def _split_list_items(text: str, include_or: bool = True) -> List[str]:
     Nota: "o" típicamente indica alternativas (cualquiera vale), mientras que
     "y" indica que se requieren/valoran ambas. Por eso somos más conservadores con "o".
     """
+    # Caso habitual: sin " o " suelto no hace falta la comprobación de
+    # items cortos, así que basta con una sola pasada
+    if not (include_or and _O_SPLIT_RE.search(text)):
+        sep_re = _LIST_SEP_OR_RE if include_or else _LIST_SEP_RE
+        items = [item.strip() for item in sep_re.split(text)]
+        return [item for item in items if item]
+
     # Primero reemplazar ", y " por solo coma
-    text = re.sub(r',\s*y\s+', ', ', text, flags=re.IGNORECASE)
+    text = _COMMA_Y_RE.sub(', ', text)
 
     # Reemplazar " y " por coma
-    text = re.sub(r'\s+y\s+', ', ', text, flags=re.IGNORECASE)
+    text = _Y_RE.sub(', ', text)
 
     # Solo procesar "o" si está habilitado y parece una lista de tecnologías cortas
     if include_or:
-        text = re.sub(r',\s*o\s+', ', ', text, flags=re.IGNORECASE)
+        text = _COMMA_O_RE.sub(', ', text)
         # Solo reemplazar " o " si ambos lados son cortos (parecen tecnologías)
-        parts = re.split(r'\s+o\s+', text, flags=re.IGNORECASE)
-        if len(parts) > 1 and all(len(p.split()) <= 2 for p in parts):
+        parts = _O_SPLIT_RE.split(text)
+        if len(parts) > 1 and all(len(p.split(None, 2)) <= 2 for p in parts):
             text = ', '.join(parts)
 
     # Ahora separar por comas
@@ -220,26 +261,49 @@ def _expand_compound_requirements(requirements: List[Requirement]) -> List[Requi
     """
     Expande requisitos compuestos en requisitos individuales.
 
+    Los duplicados (misma descripción sin distinguir mayúsculas y mismo
+    tipo) se eliminan conservando la primera aparición, para no evaluar
+    dos veces el mismo requisito.
+
     Args:
         requirements: Lista de requisitos que pueden contener items compuestos
 
     Returns:
         Lista expandida de requisitos individuales
     """
-    expanded = []
+    expanded = {}
     for req in requirements:
         split_descriptions = _split_compound_requirement(req.description)
         for desc in split_descriptions:
-            expanded.append(Requirement(
-                description=desc,
-                requirement_type=req.requirement_type
-            ))
-    return expanded
+            key = (desc.casefold().strip(), req.requirement_type)
+            if key not in expanded:
+                expanded[key] = Requirement(
+                    description=desc,
+                    requirement_type=req.requirement_type
+                )
+    return list(expanded.values())
+
+
+def _requirements_to_text(requirements: List[Requirement]) -> str:
+    """
+    Serializa los requisitos al formato compacto que esperan los prompts:
+    una línea por requisito, `M` u `O` (obligatorio u opcional), un
+    tabulador y la descripción.
+    """
+    return "\n".join(
+        f"{'M' if req.requirement_type == MANDATORY else 'O'}\t"
+        f"{' '.join(req.description.split())}"
+        for req in requirements
+    )
 
 
 class CVAnalyzer:
     """Analizador de CV contra requisitos de oferta de trabajo."""
 
+    # Ofertas ya parseadas, por (proveedor, modelo, sha256 del texto): evaluar
+    # varios CVs contra la misma oferta solo la parsea una vez
+    _job_offer_cache: Dict[Tuple[str, str, str], JobOffer] = {}
+
     def __init__(self, llm_service: LLMService):
         """
         Inicializa el analizador de CV.
@@ -248,6 +312,8 @@ class CVAnalyzer:
             llm_service: Servicio LLM para las evaluaciones
         """
         self.llm = llm_service
+        # Última oferta serializada para el prompt: (oferta, JSON)
+        self._serialized_offer: Optional[Tuple[JobOffer, str]] = None
 
     def parse_job_offer(self, offer_text: str) -> JobOffer:
         """
@@ -259,21 +325,61 @@ class CVAnalyzer:
         Returns:
             JobOffer con los requisitos extraídos
         """
-        response = self.llm.invoke_with_template_json(
-            PARSE_OFFER_PROMPT,
-            {"offer_text": offer_text}
+        key = self._offer_key(offer_text)
+        job_offer = self._job_offer_cache.get(key)
+        if job_offer is None:
+            response = self.llm.invoke_json(
+                PARSE_OFFER_PROMPT_FN(offer_text=offer_text)
+            )
+            job_offer = self._remember_job_offer(key, self._build_job_offer(response))
+        return job_offer
+
+    async def aparse_job_offer(self, offer_text: str) -> JobOffer:
+        """Versión asíncrona de `parse_job_offer`."""
+        key = self._offer_key(offer_text)
+        job_offer = self._job_offer_cache.get(key)
+        if job_offer is None:
+            response = await self.llm.ainvoke_json(
+                PARSE_OFFER_PROMPT_FN(offer_text=offer_text)
+            )
+            job_offer = self._remember_job_offer(key, self._build_job_offer(response))
+        return job_offer
+
+    def _offer_key(self, offer_text: str) -> Tuple[str, str, str]:
+        """Clave de una oferta en la caché de ofertas parseadas."""
+        return (
+            str(self.llm.provider),
+            self.llm.model,
+            hashlib.sha256(offer_text.encode("utf-8")).hexdigest(),
         )
 
+    def _remember_job_offer(
+        self, key: Tuple[str, str, str], job_offer: JobOffer
+    ) -> JobOffer:
+        """Guarda una oferta parseada, descartando la más antigua si sobra."""
+        cache = self._job_offer_cache
+        cache[key] = job_offer
+        if len(cache) > _JOB_OFFER_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        return job_offer
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Vacía la caché de ofertas parseadas."""
+        cls._job_offer_cache.clear()
+
+    def _build_job_offer(self, response: dict) -> JobOffer:
+        """Construye la oferta a partir del JSON de requisitos del LLM."""
         requirements = []
         for req in response.get("requirements", []):
-            req_type = req.get("requirement_type", "optional").lower()
+            req_type = req.get("requirement_type", OPTIONAL).lower()
             requirements.append(
                 Requirement(
                     description=req["description"],
                     requirement_type=(
-                        RequirementType.MANDATORY
-                        if req_type == "mandatory"
-                        else RequirementType.OPTIONAL
+                        MANDATORY
+                        if req_type == MANDATORY
+                        else OPTIONAL
                     ),
                 )
             )
@@ -284,40 +390,96 @@ class CVAnalyzer:
         return JobOffer(requirements=expanded_requirements)
 
     def evaluate_cv(
-        self, cv_text: str, job_offer: JobOffer
+        self, cv_text: str, job_offer: JobOffer, keep_full_report: bool = True
     ) -> CVEvaluationResult:
         """
         Evalúa un CV contra los requisitos de una oferta.
 
+        Los requisitos obligatorios se envían primero. Sin `keep_full_report`,
+        si uno no se cumple el candidato queda descartado y se deja de leer
+        la respuesta del LLM; los requisitos restantes se marcan como no
+        evaluados. Con la caché activa la respuesta se lee siempre entera,
+        porque solo se guarda si el stream se consume completo.
+
         Args:
             cv_text: Texto del CV del candidato
             job_offer: Oferta de trabajo con requisitos
+            keep_full_report: Evaluar todos los requisitos aunque el
+                candidato ya esté descartado
 
         Returns:
             Resultado de la evaluación
         """
         # Preparar requisitos para el prompt
-        requirements_json = [
-            {
-                "description": req.description,
-                "requirement_type": req.requirement_type,
-            }
-            for req in job_offer.requirements
-        ]
+        requirements_text = self._serialize_requirements(job_offer)
 
         # Pre-procesar CV para mejorar detección de habilidades
         processed_cv = _preprocess_cv_skills(cv_text)
 
-        # Obtener evaluación del LLM
-        response = self.llm.invoke_with_template_json(
-            EVALUATE_CV_PROMPT,
-            {
-                "requirements_json": str(requirements_json),
-                "cv_text": processed_cv,
-            }
+        # Obtener evaluaciones en streaming: cada una se procesa en cuanto
+        # el LLM la termina de generar
+        evaluations = self.llm.invoke_json_items(
+            EVALUATE_CV_USER_PROMPT_FN(
+                requirements_text=requirements_text,
+                cv_text=processed_cv,
+            ),
+            "evaluations",
+            system=EVALUATE_CV_SYSTEM_PROMPT,
         )
 
-        # Procesar resultados
+        try:
+            return self._aggregate_evaluations(
+                evaluations,
+                job_offer,
+                stop_on_discard=not (keep_full_report or self.llm.caches_responses),
+            )
+        finally:
+            # Cierra el stream si se cortó antes de terminar
+            evaluations.close()
+
+    async def aevaluate_cv(
+        self, cv_text: str, job_offer: JobOffer, keep_full_report: bool = True
+    ) -> CVEvaluationResult:
+        """
+        Versión asíncrona de `evaluate_cv` (una sola llamada al LLM).
+
+        Permite evaluar varios CVs u ofertas en paralelo con `asyncio.gather`.
+        """
+        response = await self.llm.ainvoke_json(
+            EVALUATE_CV_USER_PROMPT_FN(
+                requirements_text=self._serialize_requirements(job_offer),
+                cv_text=_preprocess_cv_skills(cv_text),
+            ),
+            system=EVALUATE_CV_SYSTEM_PROMPT,
+        )
+        return self._aggregate_evaluations(
+            response.get("evaluations", []),
+            job_offer,
+            stop_on_discard=not keep_full_report,
+        )
+
+    def _aggregate_evaluations(
+        self,
+        evaluations: Iterable[dict],
+        job_offer: JobOffer,
+        stop_on_discard: bool = False,
+    ) -> CVEvaluationResult:
+        """
+        Agrega las evaluaciones por requisito en el resultado final.
+
+        Los totales se calculan sobre los requisitos de la oferta, no sobre
+        las evaluaciones leídas.
+
+        Args:
+            evaluations: Evaluaciones individuales devueltas por el LLM
+            job_offer: Oferta evaluada
+            stop_on_discard: Dejar de procesar evaluaciones en cuanto un
+                requisito obligatorio descarta al candidato; los requisitos
+                sin leer se marcan como `not_evaluated`
+
+        Returns:
+            Resultado de la evaluación con puntuación, resumen y desglose
+        """
         matching = []
         unmatching = []
         not_found = []
@@ -326,12 +488,15 @@ class CVAnalyzer:
         evaluations_with_reasoning = []
 
         # Contadores para score ponderado
-        mandatory_total = 0
+        mandatory_total = sum(
+            1 for req in job_offer.requirements if req.requirement_type == MANDATORY
+        )
+        optional_total = len(job_offer.requirements) - mandatory_total
         mandatory_fulfilled = 0
-        optional_total = 0
         optional_fulfilled = 0
+        stopped = False
 
-        for evaluation in response.get("evaluations", []):
+        for evaluation in evaluations:
             req_desc = evaluation["requirement"]
             status = evaluation["status"]
             req_type = evaluation.get("requirement_type", "optional")
@@ -346,13 +511,7 @@ class CVAnalyzer:
             ))
 
             # Determinar si es obligatorio
-            is_mandatory = req_type == "mandatory" or req_type == RequirementType.MANDATORY
-
-            # Contar por tipo
-            if is_mandatory:
-                mandatory_total += 1
-            else:
-                optional_total += 1
+            is_mandatory = req_type == MANDATORY
 
             if status == "matching":
                 matching.append(req_desc)
@@ -362,14 +521,33 @@ class CVAnalyzer:
                     optional_fulfilled += 1
             elif status == "unmatching":
                 unmatching.append(req_desc)
-                if is_mandatory:
+                if is_mandatory and not discarded:
+                    # Se informa del primer requisito obligatorio incumplido
                     discarded = True
                     discarding_req = req_desc
+                    if stop_on_discard:
+                        # La puntuación ya es 0, el resto no la cambia
+                        stopped = True
+                        break
             elif status == "not_found":
                 not_found.append(req_desc)
                 # NOTA: Si es obligatorio pero no se encuentra, NO se descarta aún.
                 # Se debe preguntar en la entrevista. Sólo 'unmatching' descarta.
 
+        if stopped:
+            # Los requisitos sin leer quedan en el informe como no evaluados
+            read = {evaluation.requirement for evaluation in evaluations_with_reasoning}
+            evaluations_with_reasoning.extend(
+                RequirementEvaluation(
+                    requirement=req.description,
+                    requirement_type=req.requirement_type,
+                    status="not_evaluated",
+                    reasoning="No evaluado: el candidato ya estaba descartado",
+                )
+                for req in job_offer.requirements
+                if req.description not in read
+            )
+
         # Calcular puntuación (todos los requisitos pesan igual)
         total_requirements = mandatory_total + optional_total
         fulfilled = len(matching)
@@ -377,7 +555,7 @@ class CVAnalyzer:
         if discarded:
             score = 0
         elif total_requirements > 0:
-            score = int((fulfilled / total_requirements) * 100)
+            score = (fulfilled * 100) // total_requirements
         else:
             score = 100
 
@@ -417,6 +595,23 @@ class CVAnalyzer:
             score_breakdown=score_breakdown,
         )
 
+    def _serialize_requirements(self, job_offer: JobOffer) -> str:
+        """
+        Serializa los requisitos de la oferta para el prompt.
+
+        El resultado se reutiliza mientras se evalúe la misma oferta
+        (reintentos o varios CVs contra una misma oferta).
+        """
+        if self._serialized_offer and self._serialized_offer[0] is job_offer:
+            return self._serialized_offer[1]
+
+        # Obligatorios primero (orden estable dentro de cada tipo)
+        requirements_text = _requirements_to_text(
+            sorted(job_offer.requirements, key=lambda req: req.requirement_type != MANDATORY)
+        )
+        self._serialized_offer = (job_offer, requirements_text)
+        return requirements_text
+
     def _generate_summary(
         self,
         score: int,
@@ -446,16 +641,12 @@ class CVAnalyzer:
         strengths = []
         for req in matching[:5]:  # Máximo 5
             # Simplificar el texto del requisito
-            simplified = req.replace("Valorable ", "").replace("conocimientos en ", "")
-            simplified = simplified.replace("Experiencia mínima de ", "").replace("experiencia en ", "")
-            strengths.append(simplified)
+            strengths.append(_SUMMARY_STRIP_RE.sub("", req))
 
         # Extraer gaps (requisitos no cumplidos)
         gaps = []
-        for req in (unmatching + not_found)[:5]:  # Máximo 5
-            simplified = req.replace("Valorable ", "").replace("conocimientos en ", "")
-            simplified = simplified.replace("Experiencia mínima de ", "").replace("experiencia en ", "")
-            gaps.append(simplified)
+        for req in islice(chain(unmatching, not_found), 5):  # Máximo 5
+            gaps.append(_SUMMARY_STRIP_RE.sub("", req))
 
         return EvaluationSummary(
             status=status,
@@ -464,16 +655,99 @@ class CVAnalyzer:
             recommendation=recommendation
         )
 
-    def analyze(self, offer_text: str, cv_text: str) -> CVEvaluationResult:
+    def analyze(
+        self, offer_text: str, cv_text: str, keep_full_report: bool = True
+    ) -> CVEvaluationResult:
         """
         Ejecuta el análisis completo: parsea oferta y evalúa CV.
 
         Args:
             offer_text: Texto de la oferta de trabajo
             cv_text: Texto del CV del candidato
+            keep_full_report: Evaluar todos los requisitos aunque el
+                candidato quede descartado (ver `evaluate_cv`)
 
         Returns:
             Resultado de la evaluación
         """
         job_offer = self.parse_job_offer(offer_text)
-        return self.evaluate_cv(cv_text, job_offer), job_offer
+        return self.evaluate_cv(cv_text, job_offer, keep_full_report), job_offer
+
+    def analyze_batch(
+        self, pairs: List[Tuple[str, str]], keep_full_report: bool = True
+    ) -> List[Union[Tuple[CVEvaluationResult, JobOffer], Exception]]:
+        """
+        Analiza varios pares (oferta, CV) agrupando las llamadas al LLM.
+
+        Primero se parsean las ofertas (las repetidas o ya parseadas no se
+        vuelven a enviar) y después se evalúan todos los CVs, cada fase con
+        `invoke_json_batch`.
+
+        Args:
+            pairs: Tuplas (texto de la oferta, texto del CV)
+            keep_full_report: Ver `analyze`
+
+        Returns:
+            Tupla (resultado, oferta) de cada par, en el mismo orden, o la
+            excepción que impidió analizarlo
+        """
+        keys = [self._offer_key(offer_text) for offer_text, _ in pairs]
+        results: List[Any] = [self._job_offer_cache.get(key) for key in keys]
+        missing = [idx for idx, job_offer in enumerate(results) if job_offer is None]
+        responses = self.llm.invoke_json_batch(
+            [PARSE_OFFER_PROMPT_FN(offer_text=pairs[idx][0]) for idx in missing]
+        )
+        for idx, response in zip(missing, responses):
+            if isinstance(response, Exception):
+                results[idx] = response
+                continue
+            # Las ofertas repetidas en el lote comparten la misma instancia
+            job_offer = self._job_offer_cache.get(keys[idx])
+            if job_offer is None:
+                try:
+                    job_offer = self._remember_job_offer(
+                        keys[idx], self._build_job_offer(response)
+                    )
+                except (KeyError, AttributeError, TypeError, ValueError) as e:
+                    job_offer = e
+            results[idx] = job_offer
+
+        parsed = [
+            idx for idx, job_offer in enumerate(results)
+            if not isinstance(job_offer, Exception)
+        ]
+        evaluations = self.llm.invoke_json_batch(
+            [
+                EVALUATE_CV_USER_PROMPT_FN(
+                    requirements_text=self._serialize_requirements(results[idx]),
+                    cv_text=_preprocess_cv_skills(pairs[idx][1]),
+                )
+                for idx in parsed
+            ],
+            system=EVALUATE_CV_SYSTEM_PROMPT,
+        )
+        for idx, response in zip(parsed, evaluations):
+            job_offer = results[idx]
+            if isinstance(response, Exception):
+                results[idx] = response
+                continue
+            try:
+                results[idx] = (
+                    self._aggregate_evaluations(
+                        response.get("evaluations", []),
+                        job_offer,
+                        stop_on_discard=not keep_full_report,
+                    ),
+                    job_offer,
+                )
+            except (KeyError, AttributeError, TypeError, ValueError) as e:
+                results[idx] = e
+        return results
+
+    async def aanalyze(
+        self, offer_text: str, cv_text: str, keep_full_report: bool = True
+    ) -> Tuple[CVEvaluationResult, JobOffer]:
+        """Versión asíncrona de `analyze`."""
+        job_offer = await self.aparse_job_offer(offer_text)
+        result = await self.aevaluate_cv(cv_text, job_offer, keep_full_report)
+        return result, job_offer
@@ -1,25 +1,52 @@
 """Servicio de entrevista - Fase 2 del sistema."""
 
-from typing import List, Generator, Tuple
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Generator, Optional, Tuple
 
 from src.models.schemas import (
+    AnswerEvaluation,
     CVEvaluationResult,
     InterviewResponse,
     FinalEvaluationResult,
     JobOffer,
 )
 from src.prompts.templates import (
-    INTERVIEW_QUESTION_PROMPT,
-    EVALUATE_ANSWER_PROMPT,
+    INTERVIEW_QUESTION_PROMPT_FN,
+    INTERVIEW_QUESTIONS_BATCH_PROMPT_FN,
+    EVALUATE_ANSWER_PROMPT_FN,
+    EVALUATE_ANSWERS_BATCH_PROMPT_FN,
     GENERATE_GREETING_PROMPT,
-    GENERATE_FAREWELL_PROMPT,
+    FAREWELL_TEMPLATES,
+    FAREWELL_ALL_MATCHED,
 )
 from src.services.llm_service import LLMService
 
 
+# Respuestas que son una negativa clara y no necesitan evaluarse con el LLM
+# (el prompt de evaluación las da siempre por NO CUMPLE)
+_NEGATIVE_ANSWER_RE = re.compile(
+    r"^\s*(?:no|nunca|ninguna?|nada|ni idea|no s[eé]"
+    r"|no(?:,)? (?:tengo|he trabajado|lo he usado|lo conozco)"
+    r"(?: (?:experiencia|conocimientos?|ni idea))?)"
+    r"\s*[.!]*\s*$",
+    re.IGNORECASE,
+)
+
+# Límite de tokens para evaluar una respuesta: solo se espera un veredicto y
+# una explicación breve
+_ANSWER_MAX_TOKENS = 256
+
+
 class Interviewer:
     """Entrevistador virtual para la fase 2 del sistema."""
 
+    # Saludos ya generados, por (proveedor, modelo). El prompt no tiene
+    # variables, así que se reutilizan entre entrevistas
+    _greeting_cache: Dict[Tuple[str, str], str] = {}
+
     def __init__(self, llm_service: LLMService):
         """
         Inicializa el entrevistador.
@@ -31,8 +58,18 @@ class Interviewer:
         self.interview_responses: List[InterviewResponse] = []
 
     def generate_greeting(self) -> str:
-        """Genera un saludo inicial para el candidato."""
-        return self.llm.invoke(GENERATE_GREETING_PROMPT)
+        """Genera un saludo inicial para el candidato (cacheado por modelo)."""
+        key = (str(self.llm.provider), self.llm.model)
+        greeting = self._greeting_cache.get(key)
+        if greeting is None:
+            greeting = self.llm.invoke(GENERATE_GREETING_PROMPT)
+            self._greeting_cache[key] = greeting
+        return greeting
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Vacía la caché de saludos."""
+        cls._greeting_cache.clear()
 
     def generate_question(self, requirement: str) -> str:
         """
@@ -44,11 +81,64 @@ class Interviewer:
         Returns:
             Pregunta formulada
         """
-        return self.llm.invoke_with_template(
-            INTERVIEW_QUESTION_PROMPT,
-            {"requirement": requirement}
+        return self.llm.invoke(
+            INTERVIEW_QUESTION_PROMPT_FN(requirement=requirement)
         )
 
+    async def agenerate_question(self, requirement: str) -> str:
+        """Versión asíncrona de `generate_question`."""
+        return await self.llm.ainvoke(
+            INTERVIEW_QUESTION_PROMPT_FN(requirement=requirement)
+        )
+
+    def generate_questions(self, requirements: List[str]) -> List[str]:
+        """
+        Genera las preguntas de varios requisitos en una sola llamada al LLM.
+
+        Si la respuesta no trae una pregunta válida para algún requisito,
+        esas preguntas se generan individualmente, en paralelo.
+
+        Args:
+            requirements: Requisitos sobre los que preguntar
+
+        Returns:
+            Preguntas formuladas, en el mismo orden que los requisitos
+        """
+        if not requirements:
+            return []
+
+        try:
+            response = self.llm.invoke_json(
+                INTERVIEW_QUESTIONS_BATCH_PROMPT_FN(
+                    requirements_json=json.dumps(
+                        requirements, ensure_ascii=False, separators=(",", ":")
+                    )
+                )
+            )
+            items = response.get("questions", [])
+        except ValueError:
+            items = []
+
+        questions: List[Optional[str]] = []
+        for idx in range(len(requirements)):
+            item = items[idx] if idx < len(items) else None
+            question = item.get("question") if isinstance(item, dict) else None
+            if not isinstance(question, str) or not question.strip():
+                question = None
+            questions.append(question)
+
+        missing = [idx for idx, question in enumerate(questions) if question is None]
+        if missing:
+            async def _generate_missing() -> List[str]:
+                return await asyncio.gather(
+                    *(self.agenerate_question(requirements[idx]) for idx in missing)
+                )
+
+            for idx, question in zip(missing, asyncio.run(_generate_missing())):
+                questions[idx] = question
+
+        return [question.strip() for question in questions]
+
     def evaluate_answer(
         self, requirement: str, question: str, answer: str
     ) -> InterviewResponse:
@@ -63,31 +153,140 @@ class Interviewer:
         Returns:
             InterviewResponse con el resultado
         """
-        response = self.llm.invoke_with_template_json(
-            EVALUATE_ANSWER_PROMPT,
-            {
-                "requirement": requirement,
-                "question": question,
-                "answer": answer,
-            }
+        evaluation = self.llm.invoke_structured(
+            EVALUATE_ANSWER_PROMPT_FN(
+                requirement=requirement,
+                question=question,
+                answer=answer,
+            ),
+            AnswerEvaluation,
+            max_tokens=_ANSWER_MAX_TOKENS,
         )
 
         interview_response = InterviewResponse(
             requirement=requirement,
             question=question,
             answer=answer,
-            fulfills_requirement=response.get("fulfills_requirement", False),
+            fulfills_requirement=evaluation.fulfills_requirement,
         )
 
         self.interview_responses.append(interview_response)
         return interview_response
 
+    async def _aevaluate_answer(
+        self, requirement: str, question: str, answer: str
+    ) -> InterviewResponse:
+        """Versión asíncrona de `evaluate_answer` (no registra la respuesta)."""
+        evaluation = await self.llm.ainvoke_structured(
+            EVALUATE_ANSWER_PROMPT_FN(
+                requirement=requirement,
+                question=question,
+                answer=answer,
+            ),
+            AnswerEvaluation,
+            max_tokens=_ANSWER_MAX_TOKENS,
+        )
+        return InterviewResponse(
+            requirement=requirement,
+            question=question,
+            answer=answer,
+            fulfills_requirement=evaluation.fulfills_requirement,
+        )
+
+    def _evaluate_concurrently(
+        self, qa_pairs: List[Tuple[str, str, str]]
+    ) -> List[InterviewResponse]:
+        """Evalúa las respuestas en paralelo sin registrarlas."""
+        async def _evaluate_all() -> List[InterviewResponse]:
+            return await asyncio.gather(
+                *(self._aevaluate_answer(*qa) for qa in qa_pairs)
+            )
+
+        return asyncio.run(_evaluate_all()) if qa_pairs else []
+
+    def evaluate_answers_batch(
+        self, qa_pairs: List[Tuple[str, str, str]]
+    ) -> List[bool]:
+        """
+        Evalúa varias respuestas con una única llamada al LLM.
+
+        Las respuestas que son una negativa clara ("no", "nunca", "no tengo
+        experiencia"...) se dan por no cumplidas sin consultar al LLM. Las
+        que el LLM no devuelva o devuelva mal formadas se evalúan de nuevo
+        individualmente, en paralelo.
+
+        Args:
+            qa_pairs: Tuplas (requisito, pregunta, respuesta)
+
+        Returns:
+            Si cada respuesta cumple su requisito, en el mismo orden
+        """
+        if not qa_pairs:
+            return []
+
+        # Las negativas claras se resuelven sin consultar al LLM
+        verdicts = {}
+        for idx, (_, _, answer) in enumerate(qa_pairs, 1):
+            if _NEGATIVE_ANSWER_RE.match(answer):
+                verdicts[idx] = False
+
+        pending = [
+            {"id": idx, "requirement": req, "question": q, "answer": a}
+            for idx, (req, q, a) in enumerate(qa_pairs, 1)
+            if idx not in verdicts
+        ]
+        items = []
+        if pending:
+            qa_json = json.dumps(
+                pending, ensure_ascii=False, separators=(",", ":")
+            )
+            try:
+                response = self.llm.invoke_json(
+                    EVALUATE_ANSWERS_BATCH_PROMPT_FN(qa_json=qa_json)
+                )
+                items = response.get("evaluations", [])
+            except ValueError:
+                pass
+
+        pending_ids = {qa["id"] for qa in pending}
+        for item in items:
+            if (
+                isinstance(item, dict)
+                and item.get("id") in pending_ids
+                and isinstance(item.get("fulfills_requirement"), bool)
+            ):
+                verdicts[item["id"]] = item["fulfills_requirement"]
+
+        responses: List[Optional[InterviewResponse]] = []
+        for idx, (requirement, question, answer) in enumerate(qa_pairs, 1):
+            if idx in verdicts:
+                responses.append(InterviewResponse(
+                    requirement=requirement,
+                    question=question,
+                    answer=answer,
+                    fulfills_requirement=verdicts[idx],
+                ))
+            else:
+                responses.append(None)
+
+        # Reintento individual de las respuestas sin veredicto
+        missing = [i for i, r in enumerate(responses) if r is None]
+        if missing:
+            retried = self._evaluate_concurrently([qa_pairs[i] for i in missing])
+            for i, response in zip(missing, retried):
+                responses[i] = response
+
+        self.interview_responses.extend(responses)
+        return [response.fulfills_requirement for response in responses]
+
     def generate_farewell(
         self, initial_score: int, final_score: int, discarded: bool
     ) -> str:
         """
         Genera un mensaje de despedida con los resultados.
 
+        Se construye a partir de `FAREWELL_TEMPLATES`, sin llamar al LLM.
+
         Args:
             initial_score: Puntuación inicial
             final_score: Puntuación final
@@ -96,14 +295,8 @@ class Interviewer:
         Returns:
             Mensaje de despedida
         """
-        return self.llm.invoke_with_template(
-            GENERATE_FAREWELL_PROMPT,
-            {
-                "initial_score": initial_score,
-                "final_score": final_score,
-                "discarded": "Sí" if discarded else "No",
-            }
-        )
+        template = FAREWELL_TEMPLATES[(final_score > initial_score, discarded)]
+        return template.format(initial_score=initial_score, final_score=final_score)
 
     def conduct_interview(
         self, cv_result: CVEvaluationResult, job_offer: JobOffer
@@ -128,22 +321,41 @@ class Interviewer:
         """
         self.interview_responses = []
 
-        # Saludo inicial
-        greeting = self.generate_greeting()
-        yield ("greeting", greeting)
-
-        # Preguntas sobre requisitos no encontrados
         requirements_to_ask = cv_result.not_found_requirements.copy()
         newly_fulfilled = []
 
-        for requirement in requirements_to_ask:
-            question = self.generate_question(requirement)
-            answer = yield ("question", question)
-
-            if answer:
-                response = self.evaluate_answer(requirement, question, answer)
-                if response.fulfills_requirement:
-                    newly_fulfilled.append(requirement)
+        # Las preguntas se generan en segundo plano con una de adelanto, para
+        # que la llamada al LLM coincida con el tiempo que tarda el candidato
+        # en leer y responder la anterior
+        qa_pairs = []
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            if requirements_to_ask:
+                next_question = pool.submit(
+                    self.generate_question, requirements_to_ask[0]
+                )
+
+                # Saludo inicial (solo si hay algo que preguntar)
+                greeting = self.generate_greeting()
+                yield ("greeting", greeting)
+
+            # Preguntas sobre requisitos no encontrados; las respuestas se
+            # evalúan todas juntas al terminar
+            for idx, requirement in enumerate(requirements_to_ask):
+                question = next_question.result()
+                if idx + 1 < len(requirements_to_ask):
+                    next_question = pool.submit(
+                        self.generate_question, requirements_to_ask[idx + 1]
+                    )
+                answer = yield ("question", question)
+
+                if answer:
+                    qa_pairs.append((requirement, question, answer))
+
+        for (requirement, _, _), fulfilled in zip(
+            qa_pairs, self.evaluate_answers_batch(qa_pairs)
+        ):
+            if fulfilled:
+                newly_fulfilled.append(requirement)
 
         # Calcular puntuación final
         total_requirements = len(job_offer.requirements)
@@ -153,20 +365,24 @@ class Interviewer:
         if cv_result.discarded:
             final_score = 0
         elif total_requirements > 0:
-            final_score = int((final_fulfilled / total_requirements) * 100)
+            final_score = (final_fulfilled * 100) // total_requirements
         else:
             final_score = 100
 
         # Actualizar listas de requisitos
         final_matching = cv_result.matching_requirements + newly_fulfilled
+        fulfilled_set = set(newly_fulfilled)
         final_unmatching = [
-            req for req in requirements_to_ask if req not in newly_fulfilled
+            req for req in requirements_to_ask if req not in fulfilled_set
         ] + cv_result.unmatching_requirements
 
         # Mensaje de despedida
-        farewell = self.generate_farewell(
-            cv_result.score, final_score, cv_result.discarded
-        )
+        if requirements_to_ask:
+            farewell = self.generate_farewell(
+                cv_result.score, final_score, cv_result.discarded
+            )
+        else:
+            farewell = FAREWELL_ALL_MATCHED
         yield ("farewell", farewell)
 
         return FinalEvaluationResult(
@@ -200,14 +416,19 @@ class Interviewer:
         self.interview_responses = []
         newly_fulfilled = []
 
+        qa_pairs = []
         for requirement in cv_result.not_found_requirements:
             question = self.generate_question(requirement)
             answer = get_answer_callback(question)
 
             if answer:
-                response = self.evaluate_answer(requirement, question, answer)
-                if response.fulfills_requirement:
-                    newly_fulfilled.append(requirement)
+                qa_pairs.append((requirement, question, answer))
+
+        for (requirement, _, _), fulfilled in zip(
+            qa_pairs, self.evaluate_answers_batch(qa_pairs)
+        ):
+            if fulfilled:
+                newly_fulfilled.append(requirement)
 
         # Calcular puntuación final
         total_requirements = len(job_offer.requirements)
@@ -217,14 +438,15 @@ class Interviewer:
         if cv_result.discarded:
             final_score = 0
         elif total_requirements > 0:
-            final_score = int((final_fulfilled / total_requirements) * 100)
+            final_score = (final_fulfilled * 100) // total_requirements
         else:
             final_score = 100
 
         final_matching = cv_result.matching_requirements + newly_fulfilled
+        fulfilled_set = set(newly_fulfilled)
         final_unmatching = [
             req for req in cv_result.not_found_requirements
-            if req not in newly_fulfilled
+            if req not in fulfilled_set
         ] + cv_result.unmatching_requirements
 
         return FinalEvaluationResult(
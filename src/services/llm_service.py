@@ -4,14 +4,165 @@ Este servicio permite intercambiar fácilmente entre diferentes proveedores de L
 (Ollama, OpenAI, Anthropic, etc.) sin cambiar el código del resto de la aplicación.
 """
 
+import asyncio
+import hashlib
 import json
+import os
 import re
-from typing import Optional, Any
-from langchain_core.language_models.base import BaseLanguageModel
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING, Optional, Any, Dict, Iterator, List, Tuple, Type, TypeVar, Union
+)
+
+from src.config import get_settings, LLMProvider
+
+# LangChain se importa solo donde se usa: así importar el servicio (o usar
+# únicamente `invoke`) no recorre el grafo de módulos de langchain_core
+if TYPE_CHECKING:
+    from langchain_core.language_models.base import BaseLanguageModel
+    from pydantic import BaseModel
+
+    from src.services.cache_store import SqliteCache
+
+TModel = TypeVar("TModel", bound="BaseModel")
+
+# orjson (opcional) parsea las respuestas del LLM bastante más rápido; sus
+# errores heredan de json.JSONDecodeError, así que el manejo no cambia
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class _JsonArrayItemScanner:
+    """
+    Extrae de forma incremental los objetos de un array JSON de la respuesta.
+
+    Recibe la respuesta del LLM por fragmentos y devuelve cada objeto de
+    `"<key>": [...]` en cuanto se cierra, sin esperar al final del texto.
+    Tolera texto o bloques de código alrededor del JSON.
+    """
+
+    def __init__(self, key: str):
+        self._key_re = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self.text = ""
+        self._pos = -1          # Posición de escaneo (-1: array aún no encontrado)
+        self._depth = 0
+        self._start = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[dict]:
+        """
+        Añade un fragmento y devuelve los objetos completados con él.
 
-from src.config import settings, LLMProvider
+        Raises:
+            ValueError: Si un objeto completo no es JSON válido
+        """
+        self.text += chunk
+        items = []
+        if self.done:
+            return items
+
+        if self._pos < 0:
+            match = self._key_re.search(self.text)
+            if not match:
+                return items
+            self._pos = match.end()
+
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = self._pos
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = text[self._start:self._pos + 1]
+                    try:
+                        items.append(_json_loads(raw))
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Objeto JSON inválido en la respuesta: {raw[:200]}") from e
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                self._pos += 1
+                break
+            self._pos += 1
+        return items
+
+
+# Patrones para localizar el JSON en la respuesta, con el grupo que lo contiene
+_JSON_PATTERNS = (
+    (re.compile(r"```json\s*([\s\S]*?)\s*```"), 1),
+    (re.compile(r"```\s*([\s\S]*?)\s*```"), 1),
+)
+
+
+def _iter_json_objects(text: str) -> Iterator[str]:
+    """
+    Localiza en una sola pasada los objetos `{...}` de primer nivel del texto,
+    contando la profundidad de llaves y respetando las cadenas JSON.
+
+    Args:
+        text: Texto en el que buscar
+
+    Yields:
+        Cada objeto de primer nivel, en orden
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    escape = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            # Las comillas fuera de un objeto no abren cadena
+            in_string = depth > 0
+        elif char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i + 1]
+
+
+# Clientes LLM compartidos por todo el proceso, por configuración. Cada
+# cliente mantiene su propio pool de conexiones HTTP (o el modelo cargado en
+# memoria, en HuggingFace), así que reutilizarlo evita repetir handshakes y cargas
+_LLM_INSTANCES: Dict[Tuple[Any, ...], "BaseLanguageModel"] = {}
+_LLM_INSTANCES_LOCK = threading.Lock()
+
+# Instancias compartidas (por id) que ya han pasado por `warmup`
+_WARMED_UP: set = set()
+
+# Respuestas guardadas por instancia en la caché exacta de prompts
+_RESPONSE_CACHE_SIZE = 512
+
+# El modo JSON de OpenAI exige que los mensajes mencionen "json"
+_JSON_MODE_HINT = "Responde únicamente con un objeto JSON válido."
 
 
 class LLMService:
@@ -22,6 +173,7 @@ class LLMService:
         provider: Optional[LLMProvider] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
+        enable_cache: bool = True,
     ):
         """
         Inicializa el servicio LLM.
@@ -30,14 +182,26 @@ class LLMService:
             provider: Proveedor de LLM (por defecto usa config)
             model: Modelo específico (por defecto usa config)
             temperature: Temperatura del modelo (por defecto usa config)
+            enable_cache: Reutilizar la respuesta de un prompt idéntico ya
+                enviado (solo con temperatura 0, donde es determinista)
         """
-        self.provider = provider or settings.llm_provider
-        self.model = model or settings.llm_model
-        self.temperature = temperature if temperature is not None else settings.llm_temperature
-        self._llm: Optional[BaseLanguageModel] = None
-
-    def _create_llm(self) -> BaseLanguageModel:
+        self.settings = get_settings()
+        self.provider = provider or self.settings.llm_provider
+        self.model = model or self.settings.llm_model
+        self.temperature = temperature if temperature is not None else self.settings.llm_temperature
+        self.enable_cache = enable_cache
+        self._llm: Optional["BaseLanguageModel"] = None
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        # El servicio puede compartirse entre hilos (p. ej. tests en paralelo)
+        self._cache_lock = threading.Lock()
+        self._disk_cache = None
+        # LLM con salida estructurada por esquema (None si no la soporta)
+        self._structured: Dict[type, Any] = {}
+
+    def _create_llm(self) -> "BaseLanguageModel":
         """Crea la instancia del LLM según el proveedor configurado."""
+        settings = self.settings
+
         if self.provider == LLMProvider.OLLAMA:
             from langchain_ollama import OllamaLLM
 
@@ -45,6 +209,8 @@ class LLMService:
                 model=self.model,
                 base_url=settings.ollama_base_url,
                 temperature=self.temperature,
+                num_predict=settings.llm_max_tokens,
+                keep_alive=settings.ollama_keep_alive,
             )
 
         elif self.provider == LLMProvider.OPENAI:
@@ -56,6 +222,7 @@ class LLMService:
                 model=self.model,
                 api_key=settings.openai_api_key,
                 temperature=self.temperature,
+                max_tokens=settings.llm_max_tokens,
             )
 
         elif self.provider == LLMProvider.ANTHROPIC:
@@ -67,6 +234,7 @@ class LLMService:
                 model=self.model,
                 api_key=settings.anthropic_api_key,
                 temperature=self.temperature,
+                max_tokens=settings.llm_max_tokens,
             )
 
         elif self.provider == LLMProvider.HUGGINGFACE:
@@ -79,7 +247,7 @@ class LLMService:
                 "text-generation",
                 model=model,
                 tokenizer=tokenizer,
-                max_new_tokens=2048,
+                max_new_tokens=settings.llm_max_tokens,
                 temperature=self.temperature,
             )
             return HuggingFacePipeline(pipeline=pipe)
@@ -88,30 +256,338 @@ class LLMService:
             raise ValueError(f"Proveedor no soportado: {self.provider}")
 
     @property
-    def llm(self) -> BaseLanguageModel:
-        """Obtiene la instancia del LLM (lazy loading)."""
+    def llm(self) -> "BaseLanguageModel":
+        """Obtiene la instancia del LLM (lazy loading, compartida por configuración)."""
         if self._llm is None:
-            self._llm = self._create_llm()
+            key = (
+                self.provider,
+                self.model,
+                self.temperature,
+                self.settings.llm_max_tokens,
+                self.settings.ollama_base_url,
+                self.settings.ollama_keep_alive,
+            )
+            with _LLM_INSTANCES_LOCK:
+                if key not in _LLM_INSTANCES:
+                    _LLM_INSTANCES[key] = self._create_llm()
+                self._llm = _LLM_INSTANCES[key]
         return self._llm
 
-    def invoke(self, prompt: str, **kwargs) -> str:
+    def _build_input(
+        self, prompt: str, system: Optional[str], json_mode: bool = False
+    ) -> Any:
+        """
+        Construye la entrada del modelo a partir del prompt y, opcionalmente,
+        unas instrucciones de sistema estáticas.
+
+        En los modelos de chat las instrucciones van en un mensaje de sistema
+        propio, que los proveedores cachean entre llamadas (OpenAI de forma
+        automática por prefijo, Anthropic con `cache_control`). En los modelos
+        de texto (Ollama) se anteponen al prompt, de modo que el prefijo común
+        aprovecha la caché KV del modelo cargado.
+
+        Con `json_mode` en OpenAI se añade `_JSON_MODE_HINT` a las
+        instrucciones si ningún mensaje menciona "json" (sin esa palabra la
+        API rechaza `response_format`).
+        """
+        if (
+            json_mode
+            and self.provider == LLMProvider.OPENAI
+            and "json" not in prompt.lower()
+            and "json" not in (system or "").lower()
+        ):
+            system = f"{system}\n\n{_JSON_MODE_HINT}" if system else _JSON_MODE_HINT
+
+        if system is None:
+            return prompt
+
+        from langchain_core.language_models.chat_models import BaseChatModel
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        if not isinstance(self.llm, BaseChatModel):
+            return system + prompt
+        if self.provider == LLMProvider.ANTHROPIC:
+            system_message = SystemMessage(content=[{
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"},
+            }])
+        else:
+            system_message = SystemMessage(content=system)
+        return [system_message, HumanMessage(content=prompt)]
+
+    def _bound_llm(self, max_tokens: Optional[int] = None, json_mode: bool = False):
+        """
+        Devuelve el LLM con las opciones de esta llamada.
+
+        Args:
+            max_tokens: Límite de tokens de salida; sin él se usa el de la
+                configuración (`llm_max_tokens`). Cada proveedor lo recibe
+                con su propio nombre de parámetro.
+            json_mode: Pedir al proveedor que genere JSON válido (Ollama con
+                `format="json"`, OpenAI con `response_format`); en el resto
+                se sigue dependiendo de `_parse_json_response`
+        """
+        options: Dict[str, Any] = {}
+        if max_tokens is not None:
+            if self.provider == LLMProvider.OLLAMA:
+                # `options` sustituye a todas las opciones del modelo: se
+                # repite la temperatura para no perderla
+                options["options"] = {
+                    "temperature": self.temperature,
+                    "num_predict": max_tokens,
+                }
+            elif self.provider == LLMProvider.HUGGINGFACE:
+                options["pipeline_kwargs"] = {"max_new_tokens": max_tokens}
+            else:
+                options["max_tokens"] = max_tokens
+
+        if json_mode:
+            if self.provider == LLMProvider.OLLAMA:
+                options["format"] = "json"
+            elif self.provider == LLMProvider.OPENAI:
+                options["response_format"] = {"type": "json_object"}
+
+        return self.llm.bind(**options) if options else self.llm
+
+    @property
+    def caches_responses(self) -> bool:
+        """Indica si las respuestas se guardan en la caché exacta."""
+        return self.enable_cache and self.temperature == 0
+
+    def _cache_key(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        options: Tuple[Any, ...] = (),
+    ) -> Optional[str]:
+        """
+        Clave del prompt en la caché exacta, o None si no se cachea.
+
+        `options` recoge las opciones de la llamada que cambian la respuesta
+        (p. ej. el límite de tokens: una respuesta truncada no debe servirse
+        a una llamada con más margen).
+        """
+        if not self.caches_responses:
+            return None
+        raw = f"{self.provider.value}|{self.model}|{options!r}|{system or ''}\0{prompt}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def disk_cache(self) -> "SqliteCache":
+        """Respaldo en disco de la caché exacta (ver `SqliteCache`)."""
+        if self._disk_cache is None:
+            from src.services.cache_store import SqliteCache
+
+            self._disk_cache = SqliteCache(
+                self.settings.cache_dir / "llm.sqlite", self.settings.llm_cache_ttl
+            )
+        return self._disk_cache
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        """
+        Busca una respuesta en la caché exacta: primero en memoria y después
+        en disco, de modo que se reutilizan respuestas de ejecuciones previas.
+        """
+        if key is None:
+            return None
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        response = self.disk_cache.get(key)
+        if response is not None:
+            self._cache_set_memory(key, response)
+        return response
+
+    def _cache_set(self, key: Optional[str], response: str) -> None:
+        """Guarda una respuesta en la caché exacta (memoria y disco)."""
+        if key is None:
+            return
+        self._cache_set_memory(key, response)
+        self.disk_cache.set(key, response)
+
+    def _cache_set_memory(self, key: str, response: str) -> None:
+        """Guarda una respuesta en la caché en memoria (LRU)."""
+        with self._cache_lock:
+            self._cache[key] = response
+            self._cache.move_to_end(key)
+            if len(self._cache) > _RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def invoke(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        **kwargs,
+    ) -> str:
         """
         Invoca el LLM con un prompt simple.
 
         Args:
             prompt: El prompt a enviar al modelo
+            system: Instrucciones estáticas opcionales (ver `_build_input`)
+            max_tokens: Límite de tokens de salida para esta llamada
+                (None para usar `llm_max_tokens`)
+            json_mode: Pedir salida JSON al proveedor (ver `_bound_llm`)
 
         Returns:
             Respuesta del modelo como string
         """
-        response = self.llm.invoke(prompt)
+        key = self._cache_key(prompt, system, (max_tokens, json_mode))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = self._invoke_uncached(prompt, system, max_tokens, json_mode)
+        self._cache_set(key, response)
+        return response
+
+    def _invoke_uncached(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+    ) -> str:
+        """Invoca el LLM sin pasar por la caché de respuestas."""
+        llm = self._bound_llm(max_tokens, json_mode)
+        response = llm.invoke(self._build_input(prompt, system, json_mode))
         # Manejar diferentes tipos de respuesta
         if hasattr(response, "content"):
             return response.content
         return str(response)
 
+    async def ainvoke(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        **kwargs,
+    ) -> str:
+        """
+        Versión asíncrona de `invoke`, para lanzar varias llamadas en paralelo.
+
+        Args:
+            prompt: El prompt a enviar al modelo
+            system: Instrucciones estáticas opcionales (ver `_build_input`)
+            max_tokens: Límite de tokens de salida para esta llamada
+            json_mode: Pedir salida JSON al proveedor (ver `_bound_llm`)
+
+        Returns:
+            Respuesta del modelo como string
+        """
+        key = self._cache_key(prompt, system, (max_tokens, json_mode))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._bound_llm(max_tokens, json_mode).ainvoke(
+            self._build_input(prompt, system, json_mode)
+        )
+        if hasattr(response, "content"):
+            response = response.content
+        response = str(response)
+        self._cache_set(key, response)
+        return response
+
+    def invoke_batch(
+        self,
+        prompts: List[str],
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+    ) -> List[Union[str, Exception]]:
+        """
+        Invoca el LLM con varios prompts de una vez.
+
+        Los prompts repetidos o ya cacheados no se envían. Con HuggingFace los
+        pendientes se pasan juntos al pipeline (inferencia por lotes); el
+        resto de proveedores no acepta varios prompts por petición, así que se
+        lanzan en paralelo (como mucho `llm_max_concurrency` a la vez).
+
+        Args:
+            prompts: Prompts a enviar al modelo
+            system: Instrucciones estáticas comunes (ver `_build_input`)
+            max_tokens: Límite de tokens de salida de cada llamada
+            json_mode: Pedir salida JSON al proveedor (ver `_bound_llm`)
+
+        Returns:
+            Respuesta de cada prompt, en el mismo orden, o la excepción que
+            produjo su llamada
+        """
+        responses: List[Any] = [None] * len(prompts)
+        pending: Dict[str, List[int]] = {}
+        for idx, prompt in enumerate(prompts):
+            key = self._cache_key(prompt, system, (max_tokens, json_mode))
+            cached = self._cache_get(key)
+            if cached is not None:
+                responses[idx] = cached
+            else:
+                pending.setdefault(prompt, []).append(idx)
+        if not pending:
+            return responses
+
+        unique = list(pending)
+        if self.provider == LLMProvider.HUGGINGFACE:
+            outputs = self._bound_llm(max_tokens, json_mode).batch(
+                [self._build_input(prompt, system, json_mode) for prompt in unique],
+                return_exceptions=True,
+            )
+            for i, (prompt, output) in enumerate(zip(unique, outputs)):
+                if isinstance(output, Exception):
+                    continue
+                outputs[i] = str(getattr(output, "content", output))
+                self._cache_set(
+                    self._cache_key(prompt, system, (max_tokens, json_mode)), outputs[i]
+                )
+        else:
+            async def _invoke_all() -> List[Union[str, Exception]]:
+                semaphore = asyncio.Semaphore(self.settings.llm_max_concurrency)
+
+                async def _invoke(prompt: str) -> str:
+                    async with semaphore:
+                        return await self.ainvoke(
+                            prompt, system, max_tokens=max_tokens, json_mode=json_mode
+                        )
+
+                return await asyncio.gather(
+                    *(_invoke(prompt) for prompt in unique), return_exceptions=True
+                )
+
+            outputs = asyncio.run(_invoke_all())
+
+        for prompt, output in zip(unique, outputs):
+            for idx in pending[prompt]:
+                responses[idx] = output
+        return responses
+
+    def invoke_json_batch(
+        self, prompts: List[str], **kwargs
+    ) -> List[Union[dict, Exception]]:
+        """
+        Versión de `invoke_batch` que parsea cada respuesta como JSON.
+
+        Returns:
+            Respuesta parseada de cada prompt, en el mismo orden, o la
+            excepción de su llamada o de su parseo
+        """
+        results: List[Union[dict, Exception]] = []
+        for response in self.invoke_batch(prompts, json_mode=True, **kwargs):
+            if not isinstance(response, Exception):
+                try:
+                    response = self._parse_json_response(response)
+                except ValueError as e:
+                    response = e
+            results.append(response)
+        return results
+
     def invoke_with_template(
-        self, template: str, variables: dict[str, Any]
+        self, template: str, variables: dict[str, Any], **kwargs
     ) -> str:
         """
         Invoca el LLM usando un template de prompt.
@@ -119,13 +595,12 @@ class LLMService:
         Args:
             template: Template de prompt con variables {variable}
             variables: Diccionario con valores para las variables
+            **kwargs: Opciones de `invoke` (p. ej. `max_tokens`)
 
         Returns:
             Respuesta del modelo como string
         """
-        prompt_template = PromptTemplate.from_template(template)
-        chain = prompt_template | self.llm | StrOutputParser()
-        return chain.invoke(variables)
+        return self.invoke(template.format_map(variables), **kwargs)
 
     def invoke_json(self, prompt: str, **kwargs) -> dict:
         """
@@ -137,11 +612,181 @@ class LLMService:
         Returns:
             Respuesta parseada como diccionario
         """
-        response = self.invoke(prompt, **kwargs)
+        response = self.invoke(prompt, json_mode=True, **kwargs)
+        return self._parse_json_response(response)
+
+    def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        **kwargs,
+    ) -> Iterator[str]:
+        """
+        Invoca el LLM en modo streaming.
+
+        Args:
+            prompt: El prompt a enviar al modelo
+            system: Instrucciones estáticas opcionales (ver `_build_input`)
+            max_tokens: Límite de tokens de salida para esta llamada
+            json_mode: Pedir salida JSON al proveedor (ver `_bound_llm`)
+
+        Yields:
+            Fragmentos de texto según los genera el modelo (si la respuesta
+            está en caché, llega en un único fragmento)
+        """
+        key = self._cache_key(prompt, system, (max_tokens, json_mode))
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        llm = self._bound_llm(max_tokens, json_mode)
+        for chunk in llm.stream(self._build_input(prompt, system, json_mode)):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            chunks.append(text)
+            yield text
+        # Solo se guarda la respuesta si el stream se consumió entero
+        self._cache_set(key, "".join(chunks))
+
+    def invoke_json_items(self, prompt: str, key: str, **kwargs) -> Iterator[dict]:
+        """
+        Invoca el LLM en streaming y entrega los objetos del array `key`
+        a medida que se completan.
+
+        Si la respuesta no contiene el array en el formato esperado, se
+        recurre al parseo completo de `_parse_json_response` al terminar.
+
+        Args:
+            prompt: El prompt a enviar al modelo
+            key: Clave del array de objetos en el JSON de respuesta
+
+        Yields:
+            Cada objeto del array, en orden
+
+        Raises:
+            ValueError: Si la respuesta no contiene JSON válido
+        """
+        return self._iter_json_items(
+            self.stream(prompt, json_mode=True, **kwargs), key
+        )
+
+    def _iter_json_items(self, chunks: Iterator[str], key: str) -> Iterator[dict]:
+        """Entrega los objetos del array `key` a partir de fragmentos de texto."""
+        scanner = _JsonArrayItemScanner(key)
+        emitted = False
+        for chunk in chunks:
+            for item in scanner.feed(chunk):
+                emitted = True
+                yield item
+
+        if not emitted and not scanner.done:
+            yield from self._parse_json_response(scanner.text).get(key, [])
+
+    async def ainvoke_json(self, prompt: str, **kwargs) -> dict:
+        """
+        Versión asíncrona de `invoke_json`.
+
+        Args:
+            prompt: El prompt a enviar al modelo
+
+        Returns:
+            Respuesta parseada como diccionario
+        """
+        response = await self.ainvoke(prompt, json_mode=True, **kwargs)
         return self._parse_json_response(response)
 
+    def _structured_llm(self, schema: Type["BaseModel"]):
+        """
+        Devuelve el LLM con salida estructurada nativa para `schema`, o None
+        si el proveedor no la soporta (los modelos de texto de Ollama y HF).
+        """
+        if self.provider not in (LLMProvider.OPENAI, LLMProvider.ANTHROPIC):
+            return None
+        if schema not in self._structured:
+            try:
+                self._structured[schema] = self.llm.with_structured_output(schema)
+            except NotImplementedError:
+                self._structured[schema] = None
+        return self._structured[schema]
+
+    def invoke_structured(
+        self,
+        prompt: str,
+        schema: Type[TModel],
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> TModel:
+        """
+        Invoca el LLM y devuelve la respuesta validada con un modelo Pydantic.
+
+        Con los proveedores que la soportan se usa su salida estructurada
+        nativa (OpenAI, Anthropic) y no hace falta parsear el texto; con el
+        resto se pide JSON (`json_mode`) y se valida el resultado de
+        `invoke_json`.
+
+        Args:
+            prompt: El prompt a enviar al modelo
+            schema: Modelo Pydantic de la respuesta
+            system: Instrucciones estáticas opcionales (ver `_build_input`)
+            max_tokens: Límite de tokens de salida para esta llamada
+            **kwargs: Otras opciones de `invoke` para el modo JSON
+
+        Returns:
+            Instancia de `schema`
+
+        Raises:
+            ValueError: Si la respuesta no es JSON válido para `schema`
+        """
+        structured = self._structured_llm(schema)
+        if structured is None:
+            return schema.model_validate(
+                self.invoke_json(prompt, system=system, max_tokens=max_tokens, **kwargs)
+            )
+
+        # Una respuesta truncada no debe servirse a una llamada con más margen
+        key = self._cache_key(prompt, system, (schema.__qualname__, max_tokens))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        options = {"max_tokens": max_tokens} if max_tokens is not None else {}
+        result = structured.invoke(self._build_input(prompt, system), **options)
+        self._cache_set(key, result.model_dump_json())
+        return result
+
+    async def ainvoke_structured(
+        self,
+        prompt: str,
+        schema: Type[TModel],
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> TModel:
+        """Versión asíncrona de `invoke_structured`."""
+        structured = self._structured_llm(schema)
+        if structured is None:
+            return schema.model_validate(
+                await self.ainvoke_json(
+                    prompt, system=system, max_tokens=max_tokens, **kwargs
+                )
+            )
+
+        key = self._cache_key(prompt, system, (schema.__qualname__, max_tokens))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        options = {"max_tokens": max_tokens} if max_tokens is not None else {}
+        result = await structured.ainvoke(self._build_input(prompt, system), **options)
+        self._cache_set(key, result.model_dump_json())
+        return result
+
     def invoke_with_template_json(
-        self, template: str, variables: dict[str, Any]
+        self, template: str, variables: dict[str, Any], **kwargs
     ) -> dict:
         """
         Invoca el LLM con template y parsea respuesta como JSON.
@@ -149,12 +794,12 @@ class LLMService:
         Args:
             template: Template de prompt
             variables: Variables para el template
+            **kwargs: Opciones de `invoke` (p. ej. `max_tokens`)
 
         Returns:
             Respuesta parseada como diccionario
         """
-        response = self.invoke_with_template(template, variables)
-        return self._parse_json_response(response)
+        return self.invoke_json(template.format_map(variables), **kwargs)
 
     def _parse_json_response(self, response: str) -> dict:
         """
@@ -169,34 +814,113 @@ class LLMService:
         Raises:
             ValueError: Si no se puede parsear el JSON
         """
-        # Intentar parsear directamente
-        try:
-            return json.loads(response.strip())
-        except json.JSONDecodeError:
-            pass
-
-        # Buscar JSON en bloques de código
-        json_patterns = [
-            r"```json\s*([\s\S]*?)\s*```",
-            r"```\s*([\s\S]*?)\s*```",
-            r"\{[\s\S]*\}",
-        ]
-
-        for pattern in json_patterns:
-            match = re.search(pattern, response)
-            if match:
+        stripped = response.strip()
+
+        # Solo se intenta el parseo directo si la respuesta empieza como un
+        # objeto: con bloques ``` (lo habitual) fallaría siempre y lanzar la
+        # excepción cuesta más que mirar el primer carácter
+        if stripped[:1] == "{":
+            try:
+                return _json_loads(stripped)
+            except json.JSONDecodeError:
+                pass
+
+        # Buscar JSON en bloques de código (los que no empiezan como un
+        # objeto o array, p. ej. código de ejemplo, se descartan sin parsear)
+        if "`" in stripped:
+            for pattern, group in _JSON_PATTERNS:
+                match = pattern.search(stripped)
+                if not match:
+                    continue
+                json_str = match.group(group).strip()
+                if json_str[:1] not in ("{", "["):
+                    continue
                 try:
-                    json_str = match.group(1) if "```" in pattern else match.group(0)
-                    return json.loads(json_str.strip())
-                except (json.JSONDecodeError, IndexError):
+                    return _json_loads(json_str)
+                except json.JSONDecodeError:
                     continue
 
+        # Buscar el primer objeto JSON válido en el texto libre
+        for json_str in _iter_json_objects(response):
+            try:
+                return _json_loads(json_str)
+            except json.JSONDecodeError:
+                continue
+
         raise ValueError(f"No se pudo parsear JSON de la respuesta: {response[:200]}...")
 
-    def health_check(self) -> bool:
-        """Verifica que el LLM está funcionando correctamente."""
+    def warmup(self) -> None:
+        """
+        Lanza una petición mínima (un token) para que el proveedor cargue el
+        modelo antes de la primera llamada real.
+
+        En Ollama esto traslada la carga del modelo en memoria fuera del
+        camino que ve el usuario. Se hace una vez por instancia compartida
+        del LLM y cualquier error se ignora: la primera llamada real lo
+        volverá a intentar y lo notificará.
+        """
+        try:
+            llm_id = id(self.llm)
+            if llm_id in _WARMED_UP:
+                return
+            self._invoke_uncached("OK", max_tokens=1)
+        except Exception:
+            return
+        _WARMED_UP.add(llm_id)
+
+    def health_check(self, use_cache: bool = True) -> bool:
+        """
+        Verifica que el LLM está funcionando correctamente.
+
+        Un resultado positivo se guarda en disco durante `health_cache_ttl`
+        segundos, de modo que invocaciones seguidas de la CLI no repiten la
+        comprobación contra el mismo endpoint.
+
+        Args:
+            use_cache: Si False, siempre se consulta al LLM
+
+        Returns:
+            True si el LLM responde correctamente
+        """
+        cache_path = self.settings.cache_dir.expanduser() / "health.json"
+        cache_key = f"{self.provider.value}|{self.model}|{self.settings.ollama_base_url}"
+        ttl = self.settings.health_cache_ttl
+
+        if use_cache and ttl > 0:
+            try:
+                entries = json.loads(cache_path.read_text(encoding="utf-8"))
+                if time.time() - entries.get(cache_key, 0) < ttl:
+                    return True
+            except (OSError, ValueError, AttributeError):
+                pass
+
         try:
-            response = self.invoke("Responde solo con 'OK'")
-            return "OK" in response.upper()
+            # Directo al modelo: la caché de respuestas ocultaría un fallo
+            response = self._invoke_uncached("Responde solo con 'OK'", max_tokens=16)
+            ok = "OK" in response.upper()
         except Exception:
             return False
+
+        if ok and ttl > 0:
+            self._store_health(cache_path, cache_key)
+        return ok
+
+    @staticmethod
+    def _store_health(cache_path, cache_key: str) -> None:
+        """Registra un health check correcto (escritura atómica)."""
+        try:
+            entries = json.loads(cache_path.read_text(encoding="utf-8"))
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            entries = {}
+        entries[cache_key] = time.time()
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
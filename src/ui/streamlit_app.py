@@ -3,12 +3,20 @@
 import streamlit as st
 from pathlib import Path
 
-from src.config import settings
+from src.config import get_settings
 from src.services.llm_service import LLMService
 from src.services.cv_analyzer import CVAnalyzer
 from src.services.interviewer import Interviewer
 
 
+# Directorio con los datos de ejemplo
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+
+# Mensajes del chat que se muestran siempre; los anteriores se agrupan en un
+# desplegable para no repintar toda la conversación en cada turno
+CHAT_HISTORY_VISIBLE = 6
+
+
 def init_session_state():
     """Inicializa el estado de la sesión."""
     if "phase" not in st.session_state:
@@ -27,10 +35,14 @@ def init_session_state():
         st.session_state.messages = []
     if "llm_service" not in st.session_state:
         st.session_state.llm_service = None
+    if "llm_warmed" not in st.session_state:
+        st.session_state.llm_warmed = False
     if "interviewer" not in st.session_state:
         st.session_state.interviewer = None
     if "questions_generated" not in st.session_state:
         st.session_state.questions_generated = []
+    if "questions_shown" not in st.session_state:
+        st.session_state.questions_shown = 0
     if "newly_fulfilled" not in st.session_state:
         st.session_state.newly_fulfilled = []
 
@@ -42,12 +54,11 @@ def get_llm_service():
     return st.session_state.llm_service
 
 
+@st.cache_data(show_spinner=False)
 def load_sample_data():
-    """Carga datos de ejemplo."""
-    data_dir = Path(__file__).parent.parent.parent / "data"
-
-    offer_path = data_dir / "sample_offer.txt"
-    cv_path = data_dir / "sample_cv.txt"
+    """Carga datos de ejemplo (se leen una vez por proceso)."""
+    offer_path = DATA_DIR / "sample_offer.txt"
+    cv_path = DATA_DIR / "sample_cv.txt"
 
     offer_text = ""
     cv_text = ""
@@ -193,13 +204,22 @@ def render_analysis_phase():
                 st.session_state.current_question_idx = 0
                 st.session_state.interview_responses = []
                 st.session_state.messages = []
-                st.session_state.questions_generated = []
+                st.session_state.questions_shown = 0
                 st.session_state.newly_fulfilled = []
 
                 # Crear interviewer
                 llm_service = get_llm_service()
                 st.session_state.interviewer = Interviewer(llm_service)
 
+                # Todas las preguntas en una sola llamada, para no esperar
+                # al LLM en cada turno
+                with st.spinner("Preparando preguntas..."):
+                    st.session_state.questions_generated = (
+                        st.session_state.interviewer.generate_questions(
+                            cv_result.not_found_requirements
+                        )
+                    )
+
                 st.rerun()
         elif cv_result.discarded:
             st.info("No se puede entrevistar: candidato descartado")
@@ -207,6 +227,23 @@ def render_analysis_phase():
             st.info("No hay requisitos pendientes de verificar")
 
 
+def render_chat_history():
+    """Muestra el historial del chat, con los mensajes antiguos plegados."""
+    messages = st.session_state.messages
+    split = max(len(messages) - CHAT_HISTORY_VISIBLE, 0)
+
+    if split:
+        # Texto plano: los turnos pasados no necesitan volver a parsear markdown
+        with st.expander(f"Mensajes anteriores ({split})"):
+            for msg in messages[:split]:
+                role = "Entrevistador" if msg["role"] == "assistant" else "Tú"
+                st.text(f"{role}: {msg['content']}")
+
+    for msg in messages[split:]:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+
 def render_interview_phase():
     """Renderiza la fase de entrevista."""
     st.header("Fase 2: Entrevista")
@@ -225,10 +262,7 @@ def render_interview_phase():
     chat_container = st.container()
 
     with chat_container:
-        # Mostrar historial de mensajes
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]):
-                st.write(msg["content"])
+        render_chat_history()
 
     # Generar saludo inicial si es necesario
     if not st.session_state.messages:
@@ -240,17 +274,15 @@ def render_interview_phase():
             })
             st.rerun()
 
-    # Generar pregunta si es necesario
+    # Mostrar la pregunta actual (ya generada al iniciar la entrevista)
     if current_idx < total_questions:
-        if len(st.session_state.questions_generated) <= current_idx:
-            with st.spinner("Generando pregunta..."):
-                question = interviewer.generate_question(not_found[current_idx])
-                st.session_state.questions_generated.append(question)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": question
-                })
-                st.rerun()
+        if st.session_state.questions_shown <= current_idx:
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": st.session_state.questions_generated[current_idx]
+            })
+            st.session_state.questions_shown = current_idx + 1
+            st.rerun()
 
     # Input del candidato
     if current_idx < total_questions:
@@ -304,7 +336,7 @@ def render_results_phase():
     if cv_result.discarded:
         final_score = 0
     elif total_requirements > 0:
-        final_score = int((final_fulfilled / total_requirements) * 100)
+        final_score = (final_fulfilled * 100) // total_requirements
     else:
         final_score = 100
 
@@ -333,9 +365,8 @@ def render_results_phase():
 
     # Mensaje de despedida
     st.divider()
-    with st.spinner("Generando mensaje de despedida..."):
-        farewell = interviewer.generate_farewell(initial_score, final_score, cv_result.discarded)
-        st.info(farewell)
+    farewell = interviewer.generate_farewell(initial_score, final_score, cv_result.discarded)
+    st.info(farewell)
 
     # Detalle de respuestas
     st.subheader("Detalle de la entrevista")
@@ -362,9 +393,10 @@ def render_results_phase():
 
     with col2:
         st.markdown("**Requisitos no cumplidos:**")
+        fulfilled_set = set(newly_fulfilled)
         not_fulfilled = [
             req for req in cv_result.not_found_requirements
-            if req not in newly_fulfilled
+            if req not in fulfilled_set
         ] + cv_result.unmatching_requirements
         if not_fulfilled:
             for req in not_fulfilled:
@@ -383,6 +415,8 @@ def render_results_phase():
 
 def main():
     """Punto de entrada principal de la aplicación Streamlit."""
+    settings = get_settings()
+
     st.set_page_config(
         page_title="CV Evaluator",
         page_icon="📝",
@@ -394,6 +428,12 @@ def main():
 
     init_session_state()
 
+    # Cargar el modelo antes de la primera petición real
+    if not st.session_state.llm_warmed:
+        with st.spinner("Calentando modelo..."):
+            get_llm_service().warmup()
+        st.session_state.llm_warmed = True
+
     # Verificar conexión con LLM
     with st.sidebar:
         st.header("Configuración")
@@ -1,6 +1,6 @@
 import sys
 import json
-import os
+import asyncio
 from pathlib import Path
 
 # Add src to python path
@@ -9,6 +9,34 @@ sys.path.append(str(Path(__file__).parent.parent))
 from src.services.llm_service import LLMService
 from src.services.cv_analyzer import CVAnalyzer
 
+try:
+    import orjson
+
+    def dumps_line(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def dumps_line(obj):
+        return json.dumps(obj, ensure_ascii=False)
+
+async def analyze_cases(analyzer, cases, max_concurrency, on_result):
+    """
+    Analiza todos los casos en paralelo (como mucho max_concurrency a la vez)
+    y llama a on_result(case, cv_result) en cuanto termina cada uno.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _analyze(case):
+        async with semaphore:
+            try:
+                cv_result, _ = await analyzer.aanalyze(case['offer'], case['cv'])
+            except Exception as e:
+                # Un caso que falla no debe detener el resto de la batería
+                cv_result = e
+            return case, cv_result
+
+    for finished in asyncio.as_completed([_analyze(case) for case in cases]):
+        on_result(*await finished)
+
 def run_tests():
     print("Iniciando batería de tests complejos...")
     
@@ -23,77 +51,101 @@ def run_tests():
         if not llm_service.health_check():
             print("ERROR: Ollama no responde. Asegúrate de que está corriendo.")
             return
+        # El health check puede venir de caché: cargar el modelo antes de
+        # lanzar los casos
+        llm_service.warmup()
         analyzer = CVAnalyzer(llm_service)
     except Exception as e:
         print(f"Error inicializando servicios: {e}")
         return
 
-    results = []
-    
-    print(f"\nEjecutando {len(cases)} casos de prueba...\n")
-    
-    for case in cases:
-        print(f"Testing: {case['id']} - {case['description']}...")
-        
-        cv_result, _ = analyzer.analyze(case['offer'], case['cv'])
-        
-        # Validate expectations
-        expected = case['expected']
-        
-        failures = []
-        
-        # Check matching count
-        if 'matching_count' in expected:
-            if len(cv_result.matching_requirements) != expected['matching_count']:
-                failures.append(f"Matching count mismatch: Expected {expected['matching_count']}, got {len(cv_result.matching_requirements)} ({cv_result.matching_requirements})")
-        
-        # Check unmatching count
-        if 'unmatching_count' in expected:
-            if len(cv_result.unmatching_requirements) != expected['unmatching_count']:
-                failures.append(f"Unmatching count mismatch: Expected {expected['unmatching_count']}, got {len(cv_result.unmatching_requirements)} ({cv_result.unmatching_requirements})")
-                
-         # Check not found count
-        if 'not_found_count' in expected:
-            if len(cv_result.not_found_requirements) != expected['not_found_count']:
-                failures.append(f"Not found count mismatch: Expected {expected['not_found_count']}, got {len(cv_result.not_found_requirements)} ({cv_result.not_found_requirements})")
-
-        # Check discarded
-        if cv_result.discarded != expected['discarded']:
-            failures.append(f"Discarded mismatch: Expected {expected['discarded']}, got {cv_result.discarded} (Reason: {cv_result.discarding_requirement})")
-
-        # Store result
-        res = {
-            "id": case['id'],
-            "passed": len(failures) == 0,
-            "failures": failures,
-            "raw_result": cv_result.model_dump()
-        }
-        results.append(res)
-        
-        if res['passed']:
-            print("  PASSED ✅")
-        else:
-            print("  FAILED ❌")
-            for fail in failures:
-                print(f"    - {fail}")
-            
-            print("\n  🔍 Razonamiento del LLM:")
-            # Imprimir razonamiento si está disponible (depende de si se actualizó el modelo)
-            if hasattr(cv_result, 'evaluations_with_reasoning'):
-                for eval_item in cv_result.evaluations_with_reasoning:
-                    print(f"    - [{eval_item.status.upper()}] {eval_item.requirement}")
-                    print(f"      Explain: {eval_item.reasoning}")
-
-        print("-" * 40)
+    # Resultados detallados en JSON Lines: cada caso se valida y se escribe
+    # en cuanto termina su análisis, así sobrevive a un fallo a mitad
+    debug_file = Path("tests/test_results_debug.jsonl")
+    passed_count = 0
+
+    with open(debug_file, "w", encoding="utf-8") as debug_out:
+
+        def store_result(res):
+            nonlocal passed_count
+            passed_count += res['passed']
+            debug_out.write(dumps_line(res) + "\n")
+            debug_out.flush()
+
+        def validate_case(case, cv_result):
+            print(f"Testing: {case['id']} - {case['description']}...")
+
+            if isinstance(cv_result, Exception):
+                store_result({
+                    "id": case['id'],
+                    "passed": False,
+                    "failures": [f"Error en el análisis: {cv_result}"],
+                    "raw_result": None
+                })
+                print(f"  ERROR ❌ {cv_result}")
+                print("-" * 40)
+                return
+
+            # Validate expectations
+            expected = case['expected']
+
+            failures = []
+
+            # Check matching count
+            if 'matching_count' in expected:
+                if len(cv_result.matching_requirements) != expected['matching_count']:
+                    failures.append(f"Matching count mismatch: Expected {expected['matching_count']}, got {len(cv_result.matching_requirements)} ({cv_result.matching_requirements})")
+
+            # Check unmatching count
+            if 'unmatching_count' in expected:
+                if len(cv_result.unmatching_requirements) != expected['unmatching_count']:
+                    failures.append(f"Unmatching count mismatch: Expected {expected['unmatching_count']}, got {len(cv_result.unmatching_requirements)} ({cv_result.unmatching_requirements})")
+
+            # Check not found count
+            if 'not_found_count' in expected:
+                if len(cv_result.not_found_requirements) != expected['not_found_count']:
+                    failures.append(f"Not found count mismatch: Expected {expected['not_found_count']}, got {len(cv_result.not_found_requirements)} ({cv_result.not_found_requirements})")
+
+            # Check discarded
+            if cv_result.discarded != expected['discarded']:
+                failures.append(f"Discarded mismatch: Expected {expected['discarded']}, got {cv_result.discarded} (Reason: {cv_result.discarding_requirement})")
+
+            # Store result
+            res = {
+                "id": case['id'],
+                "passed": len(failures) == 0,
+                "failures": failures,
+                "raw_result": cv_result.model_dump()
+            }
+            store_result(res)
+
+            if res['passed']:
+                print("  PASSED ✅")
+            else:
+                print("  FAILED ❌")
+                for fail in failures:
+                    print(f"    - {fail}")
+
+                print("\n  🔍 Razonamiento del LLM:")
+                # Imprimir razonamiento si está disponible (depende de si se actualizó el modelo)
+                if hasattr(cv_result, 'evaluations_with_reasoning'):
+                    for eval_item in cv_result.evaluations_with_reasoning:
+                        print(f"    - [{eval_item.status.upper()}] {eval_item.requirement}")
+                        print(f"      Explain: {eval_item.reasoning}")
+
+            print("-" * 40)
+
+        print(f"\nEjecutando {len(cases)} casos de prueba...\n")
+
+        # Las llamadas al LLM de todos los casos se solapan; cada caso se
+        # muestra en cuanto termina, en orden de finalización
+        asyncio.run(analyze_cases(
+            analyzer, cases, llm_service.settings.llm_max_concurrency, validate_case
+        ))
 
     # Summary
-    passed_count = sum(1 for r in results if r['passed'])
     print(f"\nResumen: {passed_count}/{len(cases)} tests pasados.")
     
-    # Save detailed results for inspection
-    debug_file = Path("tests/test_results_debug.json")
-    with open(debug_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
     print(f"\n📄 Resultados detallados guardados en: {debug_file}")
     
     if passed_count < len(cases):
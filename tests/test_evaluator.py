@@ -8,32 +8,73 @@ Uso:
     python tests/test_evaluator.py           # Ejecutar todos los tests (requiere LLM)
     python tests/test_evaluator.py --dry-run # Solo probar separación de requisitos (sin LLM)
 
+Los análisis se guardan en la caché de análisis (CACHE_DIR): al repetir la
+suite, los casos sin cambios no vuelven a llamar al LLM. ANALYSIS_CACHE_TTL=0
+fuerza a analizarlos todos.
+
 Salida:
     tests/test_results.json
 """
 
 import json
+import re
 import sys
 import argparse
+from collections import Counter
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
+from typing import List, NamedTuple, Tuple
 
 # Añadir el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Los servicios se importan al arrancar, junto con argparse, y no justo
+# antes de lanzar los tests; el dry-run funciona aunque falten sus dependencias
+try:
+    from src.services.cv_analyzer import CVAnalyzer
+    from src.services.llm_service import LLMService
+    from src.services.analysis_cache import AnalysisCache
+    _SERVICES_OK = True
+except ImportError:
+    _SERVICES_OK = False
+
+# Volcado de resultados: orjson (opcional) serializa directamente a bytes
+try:
+    import orjson
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
 
 # =============================================================================
 # CASOS DE PRUEBA
 # =============================================================================
 
-TEST_CASES = [
+class TestCase(NamedTuple):
+    """Caso de prueba: oferta, CV y resultado esperado."""
+
+    # No es una clase de tests de pytest, aunque el nombre empiece por Test
+    __test__ = False
+
+    name: str
+    description: str
+    offer: str
+    cv: str
+    expected: dict
+
+
+TEST_CASES: List[TestCase] = [
     # -------------------------------------------------------------------------
     # CASO 1: Candidato perfecto - cumple todo
     # -------------------------------------------------------------------------
-    {
-        "name": "Candidato perfecto",
-        "description": "Candidato que cumple todos los requisitos obligatorios y opcionales",
-        "offer": """
+    TestCase(
+        name="Candidato perfecto",
+        description="Candidato que cumple todos los requisitos obligatorios y opcionales",
+        offer="""
 OFERTA: Desarrollador Python Senior
 
 Requisitos:
@@ -41,7 +82,7 @@ Requisitos:
 - Formación: Grado en Informática o similar (obligatorio)
 - Valorable conocimientos en FastAPI y LangChain
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Ana García
 
 EXPERIENCIA:
@@ -57,20 +98,20 @@ HABILIDADES:
 - LangChain (intermedio)
 - Docker, Git
 """,
-        "expected": {
+        expected={
             "discarded": False,
             "score_range": [75, 100],
             "should_match": ["Python", "Informática", "FastAPI", "LangChain"],
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 2: Descartado por falta de experiencia obligatoria
     # -------------------------------------------------------------------------
-    {
-        "name": "Sin experiencia suficiente",
-        "description": "Candidato junior sin los 3 años requeridos - debe ser descartado",
-        "offer": """
+    TestCase(
+        name="Sin experiencia suficiente",
+        description="Candidato junior sin los 3 años requeridos - debe ser descartado",
+        offer="""
 OFERTA: Desarrollador Python Senior
 
 Requisitos:
@@ -78,7 +119,7 @@ Requisitos:
 - Formación: Grado en Informática (obligatorio)
 - Valorable Docker y Kubernetes
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Juan Pérez
 
 EXPERIENCIA:
@@ -93,20 +134,20 @@ HABILIDADES:
 - Django
 - Git
 """,
-        "expected": {
+        expected={
             "discarded": True,
             "score_range": [0, 0],
             "reason": "experiencia mínima"
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 3: Cumple obligatorios pero NO opcionales
     # -------------------------------------------------------------------------
-    {
-        "name": "Solo requisitos obligatorios",
-        "description": "Cumple lo obligatorio pero ningún opcional",
-        "offer": """
+    TestCase(
+        name="Solo requisitos obligatorios",
+        description="Cumple lo obligatorio pero ningún opcional",
+        offer="""
 OFERTA: Desarrollador Backend
 
 Requisitos:
@@ -116,7 +157,7 @@ Requisitos:
 - Valorable conocimientos en Terraform
 - Valorable certificación en cloud
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - María López
 
 EXPERIENCIA:
@@ -131,21 +172,21 @@ HABILIDADES:
 - PostgreSQL, MySQL
 - Git, Docker
 """,
-        "expected": {
+        expected={
             "discarded": False,
             "score_range": [30, 50],
             "should_match": ["experiencia", "informática"],
             "should_not_match": ["AWS", "Terraform", "cloud"]
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 4: Requisito compuesto - cumple parcialmente
     # -------------------------------------------------------------------------
-    {
-        "name": "Requisito compuesto parcial",
-        "description": "Sabe FastAPI pero NO LangChain - debe recibir crédito parcial",
-        "offer": """
+    TestCase(
+        name="Requisito compuesto parcial",
+        description="Sabe FastAPI pero NO LangChain - debe recibir crédito parcial",
+        offer="""
 OFERTA: Desarrollador IA
 
 Requisitos:
@@ -153,7 +194,7 @@ Requisitos:
 - Grado universitario (obligatorio)
 - Valorable conocimientos en FastAPI y LangChain
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Carlos Ruiz
 
 EXPERIENCIA:
@@ -169,21 +210,21 @@ HABILIDADES:
 - Machine Learning básico
 - NO tiene experiencia con LangChain
 """,
-        "expected": {
+        expected={
             "discarded": False,
             "score_range": [60, 85],
             "should_match": ["Python", "FastAPI"],
             "should_not_match": ["LangChain"]
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 5: Múltiples tecnologías opcionales
     # -------------------------------------------------------------------------
-    {
-        "name": "Lista larga de opcionales",
-        "description": "Oferta con muchos requisitos opcionales, candidato cumple algunos",
-        "offer": """
+    TestCase(
+        name="Lista larga de opcionales",
+        description="Oferta con muchos requisitos opcionales, candidato cumple algunos",
+        offer="""
 OFERTA: Full Stack Developer
 
 Requisitos obligatorios:
@@ -196,7 +237,7 @@ Requisitos valorables:
 - Docker y Kubernetes
 - CI/CD con Jenkins o GitLab
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Laura Sánchez
 
 EXPERIENCIA:
@@ -214,21 +255,21 @@ HABILIDADES:
 - Docker (intermedio)
 - Git
 """,
-        "expected": {
+        expected={
             "discarded": False,
             "score_range": [50, 80],
             "should_match": ["React", "Node.js", "MongoDB", "Docker"],
             "should_not_match": ["Kubernetes", "PostgreSQL", "Jenkins", "GitLab"]
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 6: Sin formación requerida
     # -------------------------------------------------------------------------
-    {
-        "name": "Sin formación universitaria",
-        "description": "Tiene experiencia pero no el título requerido - debe ser descartado",
-        "offer": """
+    TestCase(
+        name="Sin formación universitaria",
+        description="Tiene experiencia pero no el título requerido - debe ser descartado",
+        offer="""
 OFERTA: Data Scientist
 
 Requisitos:
@@ -236,7 +277,7 @@ Requisitos:
 - Experiencia mínima de 2 años en Data Science
 - Valorable Python y R
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Pedro Martín
 
 EXPERIENCIA:
@@ -253,20 +294,20 @@ HABILIDADES:
 - TensorFlow, PyTorch
 - SQL
 """,
-        "expected": {
+        expected={
             "discarded": True,
             "score_range": [0, 0],
             "reason": "formación"
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 7: Alternativas en formación (OR)
     # -------------------------------------------------------------------------
-    {
-        "name": "Formación alternativa (OR)",
-        "description": "Tiene Master en IA (alternativa válida a Grado en Informática)",
-        "offer": """
+    TestCase(
+        name="Formación alternativa (OR)",
+        description="Tiene Master en IA (alternativa válida a Grado en Informática)",
+        offer="""
 OFERTA: ML Engineer
 
 Requisitos:
@@ -274,7 +315,7 @@ Requisitos:
 - Mínimo 2 años en Machine Learning
 - Valorable experiencia con PyTorch y TensorFlow
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Elena García
 
 EXPERIENCIA:
@@ -290,20 +331,20 @@ HABILIDADES:
 - TensorFlow (intermedio)
 - MLOps, Docker
 """,
-        "expected": {
+        expected={
             "discarded": False,
             "score_range": [70, 100],
             "should_match": ["Máster", "Machine Learning", "PyTorch", "TensorFlow"]
-        }
-    },
+        },
+    ),
 
     # -------------------------------------------------------------------------
     # CASO 8: CV vacío de habilidades relevantes
     # -------------------------------------------------------------------------
-    {
-        "name": "CV sin match",
-        "description": "CV de un perfil completamente diferente",
-        "offer": """
+    TestCase(
+        name="CV sin match",
+        description="CV de un perfil completamente diferente",
+        offer="""
 OFERTA: DevOps Engineer
 
 Requisitos:
@@ -312,7 +353,7 @@ Requisitos:
 - Valorable Terraform y Ansible
 - Valorable Kubernetes
 """,
-        "cv": """
+        cv="""
 CURRICULUM VITAE - Roberto Fernández
 
 EXPERIENCIA:
@@ -328,12 +369,12 @@ HABILIDADES:
 - Figma
 - HTML/CSS básico
 """,
-        "expected": {
+        expected={
             "discarded": True,
             "score_range": [0, 0],
             "reason": "DevOps"
-        }
-    },
+        },
+    ),
 ]
 
 
@@ -341,24 +382,40 @@ HABILIDADES:
 # FUNCIONES DE TESTING
 # =============================================================================
 
-def run_single_test(analyzer, test_case: dict) -> dict:
-    """Ejecuta un único caso de prueba."""
-    print(f"\n{'='*60}")
-    print(f"📋 TEST: {test_case['name']}")
-    print(f"   {test_case['description']}")
-    print('='*60)
+def run_single_test(analyzer, test_case: TestCase, analysis=None) -> dict:
+    """
+    Ejecuta un único caso de prueba.
+
+    Args:
+        analyzer: Analizador con el que evaluar el caso
+        test_case: Caso de prueba
+        analysis: Resultado ya calculado de `analyzer.analyze` (o la
+            excepción que lanzó); None para calcularlo aquí
+    """
+    # El informe se acumula y se escribe de una vez al final
+    lines = []
+    emit = lines.append
+
+    emit(f"\n{'='*60}")
+    emit(f"📋 TEST: {test_case.name}")
+    emit(f"   {test_case.description}")
+    emit('='*60)
 
     try:
         # Ejecutar análisis
-        result, job_offer = analyzer.analyze(
-            offer_text=test_case['offer'],
-            cv_text=test_case['cv']
-        )
+        if analysis is None:
+            analysis = analyzer.analyze(
+                offer_text=test_case.offer,
+                cv_text=test_case.cv
+            )
+        if isinstance(analysis, Exception):
+            raise analysis
+        result, job_offer = analysis
 
         # Preparar resultado
         test_result = {
-            "name": test_case["name"],
-            "description": test_case["description"],
+            "name": test_case.name,
+            "description": test_case.description,
             "status": "SUCCESS",
             "requirements_parsed": [
                 {
@@ -375,12 +432,12 @@ def run_single_test(analyzer, test_case: dict) -> dict:
                 "unmatching_requirements": result.unmatching_requirements,
                 "not_found_requirements": result.not_found_requirements,
             },
-            "expected": test_case["expected"],
+            "expected": test_case.expected,
             "validation": {}
         }
 
         # Validar resultados
-        expected = test_case["expected"]
+        expected = test_case.expected
 
         # Validar descarte
         if "discarded" in expected:
@@ -396,63 +453,68 @@ def run_single_test(analyzer, test_case: dict) -> dict:
             )
 
         # Mostrar resultados
-        print(f"\n📊 RESULTADOS:")
-        print(f"   Score: {result.score}%")
-        print(f"   Descartado: {'❌ SÍ' if result.discarded else '✅ NO'}")
+        emit(f"\n📊 RESULTADOS:")
+        emit(f"   Score: {result.score}%")
+        emit(f"   Descartado: {'❌ SÍ' if result.discarded else '✅ NO'}")
         if result.discarding_requirement:
-            print(f"   Motivo descarte: {result.discarding_requirement}")
+            emit(f"   Motivo descarte: {result.discarding_requirement}")
 
         # Mostrar desglose del score
         if result.score_breakdown:
             bd = result.score_breakdown
-            print(f"\n   📈 DESGLOSE DEL SCORE:")
-            print(f"      Total: {bd['fulfilled']}/{bd['total_requirements']} requisitos cumplidos")
-            print(f"      Obligatorios: {bd['mandatory']['fulfilled']}/{bd['mandatory']['total']}")
-            print(f"      Opcionales:   {bd['optional']['fulfilled']}/{bd['optional']['total']}")
+            emit(f"\n   📈 DESGLOSE DEL SCORE:")
+            emit(f"      Total: {bd['fulfilled']}/{bd['total_requirements']} requisitos cumplidos")
+            emit(f"      Obligatorios: {bd['mandatory']['fulfilled']}/{bd['mandatory']['total']}")
+            emit(f"      Opcionales:   {bd['optional']['fulfilled']}/{bd['optional']['total']}")
 
         # Mostrar evaluaciones con reasoning (nuevo)
         if result.evaluations_with_reasoning:
-            print(f"\n   🔍 EVALUACIÓN DETALLADA:")
+            emit(f"\n   🔍 EVALUACIÓN DETALLADA:")
             for eval in result.evaluations_with_reasoning:
                 status_icon = "✅" if eval.status == "matching" else "❌" if eval.status == "unmatching" else "❓"
                 tipo = "OBL" if eval.requirement_type == "mandatory" else "OPT"
-                print(f"      {status_icon} [{tipo}] {eval.requirement}")
-                print(f"         → {eval.reasoning}")
+                emit(f"      {status_icon} [{tipo}] {eval.requirement}")
+                emit(f"         → {eval.reasoning}")
 
         # Mostrar resumen ejecutivo (nuevo)
         if result.summary:
             s = result.summary
             status_color = "✅" if s.status == "APTO" else "⚠️" if s.status == "REVISAR" else "❌"
-            print(f"\n   {'═'*50}")
-            print(f"   📋 RESUMEN EJECUTIVO")
-            print(f"   {'═'*50}")
-            print(f"   Estado: {status_color} {s.status}")
+            emit(f"\n   {'═'*50}")
+            emit(f"   📋 RESUMEN EJECUTIVO")
+            emit(f"   {'═'*50}")
+            emit(f"   Estado: {status_color} {s.status}")
             if s.strengths:
-                print(f"   Fortalezas: {', '.join(s.strengths)}")
+                emit(f"   Fortalezas: {', '.join(s.strengths)}")
             if s.gaps:
-                print(f"   Gaps: {', '.join(s.gaps)}")
-            print(f"   Recomendación: {s.recommendation}")
-            print(f"   {'═'*50}")
+                emit(f"   Gaps: {', '.join(s.gaps)}")
+            emit(f"   Recomendación: {s.recommendation}")
+            emit(f"   {'═'*50}")
 
+        sys.stdout.write("\n".join(lines) + "\n")
         return test_result
 
     except Exception as e:
-        print(f"\n❌ ERROR: {str(e)}")
+        emit(f"\n❌ ERROR: {str(e)}")
+        sys.stdout.write("\n".join(lines) + "\n")
         return {
-            "name": test_case["name"],
-            "description": test_case["description"],
+            "name": test_case.name,
+            "description": test_case.description,
             "status": "ERROR",
             "error": str(e),
-            "expected": test_case["expected"],
+            "expected": test_case.expected,
         }
 
 
 def run_all_tests():
     """Ejecuta todos los casos de prueba."""
+    # Una sola marca de tiempo para la cabecera y el JSON de resultados
+    now = datetime.now()
+
     print("\n" + "="*70)
     print("🧪 INICIANDO SUITE DE TESTS - CV EVALUATOR")
     print("="*70)
-    print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Fecha: {now.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Total de casos: {len(TEST_CASES)}")
 
     # Inicializar servicios
@@ -468,16 +530,44 @@ def run_all_tests():
 
     # Ejecutar tests
     results = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "llm_provider": str(llm_service.provider),
         "llm_model": llm_service.model,
         "total_tests": len(TEST_CASES),
         "tests": []
     }
 
-    for i, test_case in enumerate(TEST_CASES, 1):
+    # Los casos ya analizados con el mismo contenido y configuración del LLM
+    # se reutilizan de la caché en disco (ANALYSIS_CACHE_TTL=0 la desactiva)
+    settings = llm_service.settings
+    cache = AnalysisCache(settings.cache_dir, settings.analysis_cache_ttl)
+    analyses = [
+        cache.get(test_case.offer, test_case.cv, llm_service)
+        for test_case in TEST_CASES
+    ]
+    missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+
+    # Las llamadas al LLM restantes se agrupan: primero las ofertas y después
+    # los CVs; los resultados se muestran en el orden de los casos
+    print(
+        f"\nAnalizando {len(missing)} casos en lote "
+        f"({len(TEST_CASES) - len(missing)} en caché)..."
+    )
+    batch = analyzer.analyze_batch(
+        [(TEST_CASES[i].offer, TEST_CASES[i].cv) for i in missing]
+    )
+    for i, analysis in zip(missing, batch):
+        if not isinstance(analysis, Exception):
+            result, job_offer = analysis
+            cache.set(
+                TEST_CASES[i].offer, TEST_CASES[i].cv, llm_service,
+                result, job_offer,
+            )
+        analyses[i] = analysis
+
+    for i, (test_case, analysis) in enumerate(zip(TEST_CASES, analyses), 1):
         print(f"\n[{i}/{len(TEST_CASES)}]", end="")
-        test_result = run_single_test(analyzer, test_case)
+        test_result = run_single_test(analyzer, test_case, analysis)
         results["tests"].append(test_result)
 
     # Resumen
@@ -485,84 +575,109 @@ def run_all_tests():
     print("📊 RESUMEN DE RESULTADOS")
     print("="*70)
 
-    success = sum(1 for t in results["tests"] if t["status"] == "SUCCESS")
-    errors = sum(1 for t in results["tests"] if t["status"] == "ERROR")
+    status_counts = Counter(t["status"] for t in results["tests"])
+    success = status_counts["SUCCESS"]
+    errors = status_counts["ERROR"]
 
     print(f"✅ Exitosos: {success}/{len(TEST_CASES)}")
     print(f"❌ Errores: {errors}/{len(TEST_CASES)}")
 
     # Validaciones
-    validations_passed = 0
-    validations_total = 0
-    for test in results["tests"]:
-        if "validation" in test:
-            for key, passed in test["validation"].items():
-                validations_total += 1
-                if passed:
-                    validations_passed += 1
+    validations = [
+        passed
+        for test in results["tests"]
+        for passed in test.get("validation", {}).values()
+    ]
+    validations_passed = sum(validations)
+    validations_total = len(validations)
 
     if validations_total > 0:
         print(f"✓ Validaciones: {validations_passed}/{validations_total}")
 
     # Guardar resultados
     output_path = Path(__file__).parent / "test_results.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    output_path.write_bytes(dumps_bytes(results))
 
     print(f"\n📁 Resultados guardados en: {output_path}")
 
     return results
 
 
+# Patrones del dry-run, compilados una sola vez (mismos que en cv_analyzer)
+_PREFIX_RES = tuple(
+    re.compile(prefix, re.IGNORECASE)
+    for prefix in (
+        r"conocimientos?\s+(?:en|de|sobre)",
+        r"experiencia\s+(?:en|con)",
+        r"manejo\s+de",
+        r"dominio\s+de",
+        r"uso\s+de",
+        r"trabajo\s+con",
+    )
+)
+_COMMA_Y_RE = re.compile(r',\s*y\s+', re.IGNORECASE)
+_Y_RE = re.compile(r'\s+y\s+', re.IGNORECASE)
+_COMMA_O_RE = re.compile(r',\s*o\s+', re.IGNORECASE)
+_O_SPLIT_RE = re.compile(r'\s+o\s+', re.IGNORECASE)
+_LIST_SEP_RE = re.compile(r',\s*y\s+|\s+y\s+|,', re.IGNORECASE)
+_LIST_SEP_OR_RE = re.compile(r',\s*[yo]\s+|\s+y\s+|,', re.IGNORECASE)
+# Líneas de la oferta que empiezan por "-" (solo espacios horizontales, para
+# no saltar de línea)
+_BULLET_RE = re.compile(r'^[^\S\n]*-[^\S\n]*(.*?)[^\S\n]*$', re.MULTILINE)
+# Palabras que marcan un requisito como obligatorio
+_MANDATORY_RE = re.compile(r'obligatorio|mínimo|imprescindible|requerido', re.IGNORECASE)
+
+
+# Copias de las funciones de separación de cv_analyzer, para que el dry-run no
+# dependa de sus imports
+def _split_list_items(text: str, include_or: bool = True) -> List[str]:
+    # Sin " o " suelto basta con una sola pasada (como en cv_analyzer)
+    if not (include_or and _O_SPLIT_RE.search(text)):
+        sep_re = _LIST_SEP_OR_RE if include_or else _LIST_SEP_RE
+        items = [item.strip() for item in sep_re.split(text)]
+        return [item for item in items if item]
+    text = _COMMA_Y_RE.sub(', ', text)
+    text = _Y_RE.sub(', ', text)
+    if include_or:
+        text = _COMMA_O_RE.sub(', ', text)
+        parts = _O_SPLIT_RE.split(text)
+        if len(parts) > 1 and all(len(p.split(None, 2)) <= 2 for p in parts):
+            text = ', '.join(parts)
+    items = [item.strip() for item in text.split(',')]
+    items = [item for item in items if item]
+    return items
+
+
+@lru_cache(maxsize=1024)
+def _split_compound_requirement(description: str) -> Tuple[str, ...]:
+    prefix_match = None
+    for prefix_re in _PREFIX_RES:
+        match = prefix_re.search(description)
+        if match:
+            prefix_match = match
+            break
+    if prefix_match:
+        before_prefix = description[:prefix_match.start()]
+        prefix_text = description[prefix_match.start():prefix_match.end()]
+        after_prefix = description[prefix_match.end():].strip()
+        items = _split_list_items(after_prefix)
+        if len(items) > 1:
+            return tuple(f"{before_prefix}{prefix_text} {item.strip()}" for item in items)
+    simple_split = _split_list_items(description)
+    if len(simple_split) > 1:
+        if all(len(item.split()) <= 3 for item in simple_split):
+            return tuple(simple_split)
+    return (description,)
+
+
 def run_dry_run():
     """
     Modo dry-run: prueba solo la lógica de separación de requisitos.
     No requiere LLM ni dependencias externas.
     """
-    import re
-    from typing import List
     from enum import Enum
 
-    # Copiar las funciones de separación para no depender de imports
-    def _split_list_items(text: str, include_or: bool = True) -> List[str]:
-        text = re.sub(r',\s*y\s+', ', ', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+y\s+', ', ', text, flags=re.IGNORECASE)
-        if include_or:
-            text = re.sub(r',\s*o\s+', ', ', text, flags=re.IGNORECASE)
-            parts = re.split(r'\s+o\s+', text, flags=re.IGNORECASE)
-            if len(parts) > 1 and all(len(p.split()) <= 2 for p in parts):
-                text = ', '.join(parts)
-        items = [item.strip() for item in text.split(',')]
-        items = [item for item in items if item]
-        return items
-
-    def _split_compound_requirement(description: str) -> List[str]:
-        prefixes = [
-            r"conocimientos?\s+(?:en|de|sobre)",
-            r"experiencia\s+(?:en|con)",
-            r"manejo\s+de",
-            r"dominio\s+de",
-            r"uso\s+de",
-            r"trabajo\s+con",
-        ]
-        prefix_match = None
-        for prefix in prefixes:
-            match = re.search(prefix, description, re.IGNORECASE)
-            if match:
-                prefix_match = match
-                break
-        if prefix_match:
-            before_prefix = description[:prefix_match.start()]
-            prefix_text = description[prefix_match.start():prefix_match.end()]
-            after_prefix = description[prefix_match.end():].strip()
-            items = _split_list_items(after_prefix)
-            if len(items) > 1:
-                return [f"{before_prefix}{prefix_text} {item.strip()}" for item in items]
-        simple_split = _split_list_items(description)
-        if len(simple_split) > 1:
-            if all(len(item.split()) <= 3 for item in simple_split):
-                return simple_split
-        return [description]
+    now = datetime.now()
 
     # Tipos simples para el dry-run
     class RequirementType(str, Enum):
@@ -812,8 +927,8 @@ Ingeniería Informática""",
         print(f"\n{status} Input: \"{test['input']}\"")
         print(f"   Esperado: {test['expected_count']} items")
         print(f"   Obtenido: {len(result)} items")
-        for r in result:
-            print(f"      → \"{r}\"")
+        if result:
+            print("\n".join(f"      → \"{r}\"" for r in result))
 
         results.append({
             "input": test["input"],
@@ -833,46 +948,44 @@ Ingeniería Informática""",
     print("="*70)
 
     for test_case in TEST_CASES:
-        print(f"\n🔹 {test_case['name']}")
+        print(f"\n🔹 {test_case.name}")
 
         # Simular extracción de requisitos (solo buscar líneas con "-")
-        lines = test_case["offer"].split("\n")
         mock_requirements = []
-        for line in lines:
-            line = line.strip()
-            if line.startswith("-"):
-                req_text = line[1:].strip()
-                # Detectar tipo
-                lower = req_text.lower()
-                if any(kw in lower for kw in ["obligatorio", "mínimo", "imprescindible", "requerido"]):
-                    req_type = RequirementType.MANDATORY
-                else:
-                    req_type = RequirementType.OPTIONAL
+        for match in _BULLET_RE.finditer(test_case.offer):
+            req_text = match.group(1)
+            # Detectar tipo
+            if _MANDATORY_RE.search(req_text):
+                req_type = RequirementType.MANDATORY
+            else:
+                req_type = RequirementType.OPTIONAL
 
-                mock_requirements.append(Requirement(
-                    description=req_text,
-                    requirement_type=req_type
-                ))
+            mock_requirements.append(Requirement(
+                description=req_text,
+                requirement_type=req_type
+            ))
 
         # Expandir
         expanded = _expand_compound_requirements(mock_requirements)
 
         print(f"   Original: {len(mock_requirements)} requisitos")
         print(f"   Expandido: {len(expanded)} requisitos")
-        for req in expanded:
-            tipo = "🔴" if req.requirement_type == RequirementType.MANDATORY else "🟢"
-            print(f"      {tipo} {req.description}")
+        if expanded:
+            print("\n".join(
+                f"      {'🔴' if req.requirement_type == RequirementType.MANDATORY else '🟢'}"
+                f" {req.description}"
+                for req in expanded
+            ))
 
     # Guardar resultados
     output_path = Path(__file__).parent / "dry_run_results.json"
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "timestamp": datetime.now().isoformat(),
-            "mode": "dry-run",
-            "separation_tests": results,
-            "passed": passed,
-            "total": len(separation_tests)
-        }, f, indent=2, ensure_ascii=False)
+    output_path.write_bytes(dumps_bytes({
+        "timestamp": now.isoformat(),
+        "mode": "dry-run",
+        "separation_tests": results,
+        "passed": passed,
+        "total": len(separation_tests)
+    }))
 
     print(f"\n📁 Resultados guardados en: {output_path}")
 
@@ -888,7 +1001,7 @@ if __name__ == "__main__":
 
     if args.dry_run:
         run_dry_run()
-    else:
-        from src.services.cv_analyzer import CVAnalyzer
-        from src.services.llm_service import LLMService
+    elif _SERVICES_OK:
         run_all_tests()
+    else:
+        sys.exit("No se pueden importar los servicios: instala las dependencias (requirements.txt)")